@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import (AuthenticationFailed,
+                                                 InvalidToken)
+from rest_framework_simplejwt.settings import api_settings
+
+from users.models import ClaimsRevocation, User
+
+# В порядке полей модели: так значения ожидает Model.from_db().
+SNAPSHOT_FIELDS = ("id", "username", "is_staff", "is_active", "role")
+USER_CLAIMS = ("username", "is_staff", "role")
+
+
+class UserSnapshotCache:
+    """
+    LRU-кэш снимков пользователя (SNAPSHOT_FIELDS) с TTL, свой в процессе.
+
+    Сигналы User (api.signals) удаляют снимок при сохранении и удалении,
+    изменения из других процессов видны не позже чем через timeout.
+    """
+
+    def __init__(self, size, timeout):
+        self.size = size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, pk):
+        with self.lock:
+            entry = self.entries.get(pk)
+            if entry is None:
+                return None
+            values, expires = entry
+            if expires <= time.monotonic():
+                del self.entries[pk]
+                return None
+            self.entries.move_to_end(pk)
+            return values
+
+    def set(self, pk, values):
+        with self.lock:
+            self.entries[pk] = (values, time.monotonic() + self.timeout)
+            self.entries.move_to_end(pk)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, pk):
+        with self.lock:
+            self.entries.pop(pk, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+user_snapshots = UserSnapshotCache(
+    settings.USER_CACHE_SIZE, settings.USER_CACHE_TIMEOUT
+)
+
+
+def user_from_snapshot(values):
+    """User из снимка: остальные поля догружаются при обращении к ним."""
+    return User.from_db(DEFAULT_DB_ALIAS, SNAPSHOT_FIELDS, values)
+
+
+def add_user_claims(token, user):
+    for claim in USER_CLAIMS:
+        token[claim] = getattr(user, claim)
+    return token
+
+
+class RevocationList:
+    """
+    Копия таблицы ClaimsRevocation в процессе за время жизни токена.
+
+    Перечитывается не реже раза в timeout, поэтому отзыв из другого
+    процесса виден с той же задержкой, что и снимки user_snapshots.
+    Отзывы этого процесса видны сразу.
+    """
+
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.revoked = {}
+        self.expires = 0.0
+
+    @staticmethod
+    def oldest():
+        """Отметки старше этого момента касаются только истекших токенов."""
+        lifetime = api_settings.ACCESS_TOKEN_LIFETIME.total_seconds()
+        return int(time.time() - lifetime)
+
+    def refresh(self):
+        """Свои отметки сохраняются: их транзакция могла еще не закончиться."""
+        oldest = self.oldest()
+        revoked = dict(
+            ClaimsRevocation.objects.filter(revoked_at__gte=oldest)
+            .order_by("revoked_at")
+            .values_list("user_id", "revoked_at")
+        )
+        with self.lock:
+            for user_id, revoked_at in self.revoked.items():
+                if revoked_at > revoked.get(user_id, oldest):
+                    revoked[user_id] = revoked_at
+            self.revoked = revoked
+            self.expires = time.monotonic() + self.timeout
+
+    def get(self, user_id):
+        if self.expires <= time.monotonic():
+            self.refresh()
+        with self.lock:
+            return self.revoked.get(user_id)
+
+    def add(self, user_id, revoked_at):
+        with self.lock:
+            self.revoked[user_id] = revoked_at
+
+    def clear(self):
+        with self.lock:
+            self.revoked = {}
+            self.expires = 0.0
+
+
+revocations = RevocationList(settings.USER_CACHE_TIMEOUT)
+
+
+def revoke_user_claims(pk):
+    """Токены, выпущенные до этого момента, перестают доверять claims.
+
+    Отметка пишется в ту же транзакцию, что и изменение пользователя.
+    """
+    revoked_at = int(time.time())
+    revocations.add(pk, revoked_at)
+    ClaimsRevocation.objects.filter(user_id=pk).delete()
+    ClaimsRevocation.objects.create(user_id=pk, revoked_at=revoked_at)
+
+
+def claims_trusted(token, user_id):
+    if any(claim not in token for claim in USER_CLAIMS):
+        return False
+    revoked_at = revocations.get(user_id)
+    return revoked_at is None or token.get("iat", 0) > revoked_at
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication без чтения таблицы users на каждый запрос.
+
+    Если в токене есть USER_CLAIMS и они не отозваны revoke_user_claims
+    (таблица ClaimsRevocation), пользователь собирается из токена.
+    Иначе, например после смены роли, берется снимок из user_snapshots.
+    """
+
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(
+                _("Token contained no recognizable user identification")
+            )
+        if claims_trusted(validated_token, user_id):
+            return user_from_snapshot(
+                (
+                    user_id,
+                    validated_token["username"],
+                    validated_token["is_staff"],
+                    True,
+                    validated_token["role"],
+                )
+            )
+        values = user_snapshots.get(user_id)
+        if values is None:
+            values = (
+                User.objects.filter(**{api_settings.USER_ID_FIELD: user_id})
+                .values_list(*SNAPSHOT_FIELDS)
+                .first()
+            )
+            if values is None:
+                raise AuthenticationFailed(
+                    _("User not found"), code="user_not_found"
+                )
+            user_snapshots.set(user_id, values)
+        user = user_from_snapshot(values)
+        if not user.is_active:
+            raise AuthenticationFailed(
+                _("User is inactive"), code="user_inactive"
+            )
+        return user
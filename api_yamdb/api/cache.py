@@ -0,0 +1,119 @@
+import secrets
+import time
+from datetime import datetime, timezone
+from hashlib import md5
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.exceptions import EmptyResultSet, ImproperlyConfigured
+
+VERSION_KEY = "version:{}"
+CHANGED_KEY = "changed:{}"
+ALL_TABLES = "*"
+
+# Последние версии таблиц, выданные сигналами этого процесса.
+local_versions = {}
+
+
+def get_version_cache():
+    """Кэш версий таблиц (VERSIONS_CACHE), общий для всех процессов."""
+    return caches[settings.VERSIONS_CACHE]
+
+
+def require_shared_versions():
+    """Команды вне веб-процесса без общего кэша версий ничего не сбросят."""
+    if isinstance(get_version_cache(), (LocMemCache, DummyCache)):
+        raise ImproperlyConfigured(
+            f"Кэш {settings.VERSIONS_CACHE!r} (VERSIONS_CACHE) должен быть "
+            "общим для процессов, например FileBasedCache: иначе версии "
+            "таблиц в веб-процессах не изменятся."
+        )
+
+
+def new_version():
+    """Версия, которая не повторится и после вытеснения ключа из кэша."""
+    return f"{time.time_ns():x}-{secrets.token_hex(4)}"
+
+
+def get_tables(models):
+    """Таблицы моделей вместе с промежуточными таблицами ManyToMany."""
+    tables = set()
+    for model in models:
+        tables.add(model._meta.db_table)
+        tables.update(
+            field.remote_field.through._meta.db_table
+            for field in model._meta.local_many_to_many
+        )
+    return sorted(tables)
+
+
+def get_versions(tables):
+    """Версии таблиц для ключей кэша; общая версия ALL_TABLES идет первой."""
+    names = (ALL_TABLES, *tables)
+    keys = [VERSION_KEY.format(table) for table in names]
+    version_cache = get_version_cache()
+    versions = version_cache.get_many(keys)
+    for table, key in zip(names, keys):
+        if key not in versions:
+            # Ключа нет (первое обращение или вытеснение): новая версия
+            # не совпадет ни с одной из прежних, время записи - сейчас.
+            version_cache.add(key, new_version(), None)
+            version_cache.add(CHANGED_KEY.format(table), time.time(), None)
+            versions[key] = version_cache.get(key) or new_version()
+    return tuple(versions[key] for key in keys)
+
+
+def get_queryset_key(prefix, queryset):
+    """Ключ результата запроса: SQL, параметры и версии всех его таблиц.
+
+    None, если запрос заведомо пуст (EmptyResultSet).
+    """
+    query = queryset.query
+    table = queryset.model._meta.db_table
+    tables = sorted(
+        {table, *(alias.table_name for alias in query.alias_map.values())}
+    )
+    try:
+        sql, params = query.sql_with_params()
+    except EmptyResultSet:
+        return None
+    signature = md5(
+        repr((sql, params, get_versions(tables))).encode()
+    ).hexdigest()
+    return f"{prefix}:{table}:{signature}"
+
+
+def get_changed_at(tables):
+    """Время последней записи в любую из таблиц, если оно известно."""
+    keys = [CHANGED_KEY.format(table) for table in (ALL_TABLES, *tables)]
+    stamps = get_version_cache().get_many(keys).values()
+    if not stamps:
+        return None
+    return datetime.fromtimestamp(max(stamps), tz=timezone.utc)
+
+
+def bump_versions(*tables, local=False):
+    """
+    Инвалидирует все записи кэша, построенные по этим таблицам.
+
+    local=True - изменения пришли через сигналы моделей этого процесса:
+    версии запоминаются в local_versions, и индексы в памяти процесса,
+    уже обновленные теми же сигналами, не перестраиваются.
+    """
+    now = time.time()
+    versions = {table: new_version() for table in tables}
+    if local:
+        local_versions.update(versions)
+    get_version_cache().set_many(
+        {
+            **{VERSION_KEY.format(t): v for t, v in versions.items()},
+            **{CHANGED_KEY.format(table): now for table in tables},
+        },
+        None,
+    )
+
+
+def bump_all_versions():
+    bump_versions(ALL_TABLES)
@@ -0,0 +1,121 @@
+import csv
+import json
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+Dataset = namedtuple("Dataset", ("filename", "model", "columns"))
+
+# Раскладка static/data/*.csv: колонка файла -> attname поля модели.
+# Порядок соответствует зависимостям по внешним ключам.
+DATASETS = {
+    "users": Dataset(
+        "users.csv",
+        User,
+        {
+            "id": "id",
+            "username": "username",
+            "email": "email",
+            "role": "role",
+            "bio": "bio",
+            "first_name": "first_name",
+            "last_name": "last_name",
+        },
+    ),
+    "category": Dataset(
+        "category.csv", Category, {"id": "id", "name": "name", "slug": "slug"}
+    ),
+    "genre": Dataset(
+        "genre.csv", Genre, {"id": "id", "name": "name", "slug": "slug"}
+    ),
+    "titles": Dataset(
+        "titles.csv",
+        Title,
+        {
+            "id": "id",
+            "name": "name",
+            "year": "year",
+            "category": "category_id",
+        },
+    ),
+    "genre_title": Dataset(
+        "genre_title.csv",
+        Title.genre.through,
+        {"id": "id", "title_id": "title_id", "genre_id": "genre_id"},
+    ),
+    "review": Dataset(
+        "review.csv",
+        Review,
+        {
+            "id": "id",
+            "title_id": "title_id",
+            "text": "text",
+            "author": "author_id",
+            "score": "score",
+            "pub_date": "pub_date",
+        },
+    ),
+    "comments": Dataset(
+        "comments.csv",
+        Comment,
+        {
+            "id": "id",
+            "review_id": "review_id",
+            "text": "text",
+            "author": "author_id",
+            "pub_date": "pub_date",
+        },
+    ),
+}
+
+EXPORT_FORMATS = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson; charset=utf-8",
+}
+
+EXPORT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    """Буфер для csv.writer, который сразу возвращает записанную строку."""
+
+    def write(self, value):
+        return value
+
+
+def export_value(value):
+    if isinstance(value, datetime):
+        value = value.astimezone(timezone.utc).isoformat(
+            timespec="milliseconds"
+        )
+        return value.replace("+00:00", "Z")
+    return value
+
+
+def iter_rows(dataset, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки набора по возрастанию pk; в памяти не больше одной порции."""
+    rows = (
+        dataset.model.objects.order_by("pk")
+        .values_list(*dataset.columns.values())
+        .iterator(chunk_size=chunk_size)
+    )
+    for row in rows:
+        yield [export_value(value) for value in row]
+
+
+def iter_export(dataset, export_format, chunk_size=EXPORT_CHUNK_SIZE):
+    """Строки csv (с заголовком) или NDJSON для потоковой отдачи."""
+    columns = list(dataset.columns)
+    rows = iter_rows(dataset, chunk_size)
+    if export_format == "ndjson":
+        for row in rows:
+            yield json.dumps(dict(zip(columns, row)), ensure_ascii=False)
+            yield "\n"
+        return
+    writer = csv.writer(Echo(), lineterminator="\n")
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
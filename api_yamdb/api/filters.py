@@ -0,0 +1,49 @@
+from rest_framework import filters
+
+
+class StableOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter с добиванием порядка по id для стабильных страниц.
+
+    Без параметра ordering сохраняется порядок, заданный предыдущими
+    фильтрами (например, релевантность поиска), иначе берется ordering view.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        if (
+            self.ordering_param not in request.query_params
+            and queryset.query.order_by
+        ):
+            return queryset
+        return super().filter_queryset(request, queryset, view)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        if not ordering:
+            return ordering
+        ordering = list(ordering)
+        if ordering[-1].lstrip("-") not in ("id", "pk"):
+            ordering.append("-id" if ordering[0].startswith("-") else "id")
+        return ordering
+
+
+class NameSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter по name_normalized (titles.models.NameQuerySet).
+
+    "^name" ищет по префиксу через индекс, "name" - подстроку через
+    триграммы; регистр не учитывается и для кириллицы.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        if not search_fields or not search_terms:
+            return queryset
+        prefix = all(field.startswith("^") for field in search_fields)
+        for term in search_terms:
+            if prefix:
+                queryset = queryset.name_startswith(term)
+            else:
+                queryset = queryset.name_contains(term)
+        return queryset
@@ -0,0 +1,50 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.datasets import (DATASETS, EXPORT_CHUNK_SIZE, EXPORT_FORMATS,
+                          iter_export)
+
+
+class Command(BaseCommand):
+    help = (
+        "Выгружает наборы данных в раскладке static/data/*.csv или в NDJSON. "
+        "Строки читаются порциями через iterator(), память не растет "
+        "с размером таблицы."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "datasets",
+            nargs="*",
+            help="Наборы для выгрузки, по умолчанию все: "
+            + ", ".join(DATASETS),
+        )
+        parser.add_argument(
+            "--format", choices=list(EXPORT_FORMATS), default="csv"
+        )
+        parser.add_argument("--output", default=".", help="Каталог выгрузки.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=EXPORT_CHUNK_SIZE
+        )
+
+    def handle(self, *args, **options):
+        if not os.path.isdir(options["output"]):
+            raise CommandError(f"Нет каталога {options['output']}")
+        unknown = set(options["datasets"]) - set(DATASETS)
+        if unknown:
+            raise CommandError(f"Неизвестные наборы: {', '.join(unknown)}")
+        for name in options["datasets"] or DATASETS:
+            dataset = DATASETS[name]
+            filename = dataset.filename
+            if options["format"] == "ndjson":
+                filename = f"{name}.ndjson"
+            path = os.path.join(options["output"], filename)
+            started = time.monotonic()
+            with open(path, "w", encoding="utf-8", newline="") as target:
+                for chunk in iter_export(
+                    dataset, options["format"], options["chunk_size"]
+                ):
+                    target.write(chunk)
+            self.stdout.write(f"{path}: {time.monotonic() - started:.2f} с")
@@ -0,0 +1,195 @@
+import csv
+import json
+import os
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import IntegrityError, connection, transaction
+
+from api.cache import bump_all_versions, require_shared_versions
+from api.datasets import DATASETS
+from titles.models import Category, Genre, NameTrigram, Title
+
+NAMED_MODELS = (Category, Genre, Title)
+
+
+@contextmanager
+def keep_auto_now(model):
+    """Сохраняет pub_date из файла: bulk_create иначе подставит now()."""
+    fields = [
+        field
+        for field in model._meta.concrete_fields
+        if getattr(field, "auto_now_add", False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+class Command(BaseCommand):
+    help = (
+        "Загружает static/data/*.csv: потоковое чтение, bulk_create "
+        "порциями в отдельных транзакциях, без сигналов на каждую строку. "
+        "После сбоя --resume продолжает с первой незакоммиченной порции. "
+        "Строки, конфликтующие с уже загруженными, останавливают импорт."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--path",
+            default=os.path.join(settings.BASE_DIR, "static", "data"),
+            help="Каталог с csv-файлами.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=5000)
+        parser.add_argument(
+            "--state-file",
+            default=os.path.join(settings.BASE_DIR, ".import_csv.json"),
+            help="Файл с прогрессом: строки по файлам и загруженные файлы.",
+        )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            help="Пропустить строки, загруженные прошлым запуском.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            require_shared_versions()
+        except ImproperlyConfigured as error:
+            raise CommandError(error)
+        self.state_file = options["state_file"]
+        self.resume = options["resume"]
+        state = self.load_state() if options["resume"] else {}
+        state.setdefault("rows", {})
+        state.setdefault("done", [])
+        try:
+            self.import_all(options["path"], options["chunk_size"], state)
+        finally:
+            # Порции коммитятся по отдельности: версии сбрасываются и
+            # после сбоя, иначе веб-процессы отдавали бы старый кэш.
+            bump_all_versions()
+        if os.path.exists(self.state_file):
+            os.remove(self.state_file)
+        self.stdout.write(self.style.SUCCESS("Импорт завершен"))
+
+    def import_all(self, directory, chunk_size, state):
+        for filename, model, columns in DATASETS.values():
+            path = os.path.join(directory, filename)
+            if not os.path.exists(path):
+                raise CommandError(f"Нет файла {path}")
+            if filename in state["done"]:
+                self.stdout.write(f"{filename}: загружен ранее, пропущен")
+                continue
+            with keep_auto_now(model):
+                self.import_file(
+                    path, filename, model, columns, chunk_size, state
+                )
+        self.reset_sequences()
+        started = time.monotonic()
+        Title.objects.rebuild_ratings()
+        self.stdout.write(
+            f"Рейтинги пересчитаны за {time.monotonic() - started:.2f} с"
+        )
+
+    def import_file(self, path, filename, model, columns, chunk_size, state):
+        done = state["rows"].get(filename, 0)
+        fields = {field.attname: field for field in model._meta.fields}
+        started = time.monotonic()
+        loaded = 0
+        chunk = []
+        # Сбой мог случиться между коммитом порции и записью прогресса:
+        # первая порция после --resume может быть уже в базе.
+        replay = self.resume
+        with open(path, encoding="utf-8", newline="") as source:
+            for number, row in enumerate(csv.DictReader(source), start=1):
+                if number <= done:
+                    continue
+                chunk.append(self.build(model, fields, columns, row, path))
+                if len(chunk) >= chunk_size:
+                    loaded += self.flush(model, chunk, filename, state, replay)
+                    chunk = []
+                    replay = False
+        if chunk:
+            loaded += self.flush(model, chunk, filename, state, replay)
+        state["done"].append(filename)
+        self.save_state(state)
+        elapsed = time.monotonic() - started
+        rate = loaded / elapsed if elapsed else loaded
+        self.stdout.write(
+            f"{filename}: {loaded} строк за {elapsed:.2f} с "
+            f"({rate:.0f} строк/с)"
+        )
+
+    @staticmethod
+    def build(model, fields, columns, row, path):
+        values = {}
+        for column, value in row.items():
+            if column not in columns:
+                raise CommandError(f"{path}: неизвестная колонка {column}")
+            name = columns[column]
+            field = fields[name]
+            if value == "" and field.null:
+                value = None
+            values[name] = field.to_python(value)
+        return model(**values)
+
+    def flush(self, model, chunk, filename, state, replay=False):
+        """Загружает порцию; возвращает число действительно вставленных строк.
+
+        ignore_conflicts только для повтора порции после сбоя, иначе
+        конфликт (дубликат отзыва, email) останавливает импорт.
+        """
+        first = state["rows"].get(filename, 0) + 1
+        try:
+            with transaction.atomic():
+                if replay:
+                    before = self.count_loaded(model, chunk)
+                    model.objects.bulk_create(chunk, ignore_conflicts=True)
+                    inserted = self.count_loaded(model, chunk) - before
+                else:
+                    model.objects.bulk_create(chunk)
+                    inserted = len(chunk)
+                if model in NAMED_MODELS:
+                    NameTrigram.objects.index(chunk)
+        except IntegrityError as error:
+            raise CommandError(
+                f"{filename}: строки {first}-{first + len(chunk) - 1} "
+                f"конфликтуют с данными в базе: {error}"
+            )
+        state["rows"][filename] = first - 1 + len(chunk)
+        self.save_state(state)
+        return inserted
+
+    @staticmethod
+    def count_loaded(model, chunk):
+        pks = [obj.pk for obj in chunk]
+        if None in pks:
+            return model.objects.count()
+        return model.objects.filter(pk__in=pks).count()
+
+    def load_state(self):
+        if not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, encoding="utf-8") as state_file:
+            return json.load(state_file)
+
+    def save_state(self, state):
+        with open(self.state_file, "w", encoding="utf-8") as state_file:
+            json.dump(state, state_file)
+
+    @staticmethod
+    def reset_sequences():
+        """Явные id из файлов не сдвигают sequence в PostgreSQL."""
+        models = [dataset.model for dataset in DATASETS.values()]
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
@@ -0,0 +1,159 @@
+import threading
+from bisect import bisect_left
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Границы корзин гистограммы задержек, секунды.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def format_labels(names, values, **extra):
+    pairs = [*zip(names, values), *extra.items()]
+    if not pairs:
+        return ""
+    escaped = (
+        (name, str(value).replace("\\", r"\\").replace('"', r"\""))
+        for name, value in pairs
+    )
+    return "{%s}" % ",".join(f'{name}="{value}"' for name, value in escaped)
+
+
+class Metric:
+    """Метрика с набором меток; серии хранятся по кортежу значений."""
+
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def header(self):
+        return [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+
+    def snapshot(self):
+        with self.lock:
+            return sorted(
+                (values, self.copy(state))
+                for values, state in self.series.items()
+            )
+
+    def reset(self):
+        with self.lock:
+            self.series.clear()
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    @staticmethod
+    def copy(state):
+        return state
+
+    def inc(self, *values, amount=1):
+        with self.lock:
+            self.series[values] = self.series.get(values, 0) + amount
+
+    def collect(self):
+        lines = self.header()
+        for values, total in self.snapshot():
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}{labels} {total}")
+        return lines
+
+
+class Histogram(Metric):
+    """Гистограмма с фиксированными корзинами.
+
+    observe() под замком делает только bisect и три сложения;
+    накопительные значения корзин считаются при выгрузке.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=()):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    @staticmethod
+    def copy(state):
+        counts, total = state
+        return list(counts), total
+
+    def observe(self, value, *values):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.series.get(values)
+            if state is None:
+                state = self.series[values] = [
+                    [0] * (len(self.buckets) + 1),
+                    0.0,
+                ]
+            state[0][index] += 1
+            state[1] += value
+
+    def collect(self):
+        lines = self.header()
+        bounds = [*map(repr, map(float, self.buckets)), "+Inf"]
+        for values, (counts, total) in self.snapshot():
+            cumulative = 0
+            for bound, count in zip(bounds, counts):
+                cumulative += count
+                labels = format_labels(self.labels, values, le=bound)
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = format_labels(self.labels, values)
+            lines.append(f"{self.name}_sum{labels} {total}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Метрики процесса; при нескольких процессах WSGI у каждого свои."""
+
+    def __init__(self):
+        self.metrics = []
+
+    def register(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        for metric in self.metrics:
+            metric.reset()
+
+
+registry = Registry()
+
+REQUESTS = registry.register(
+    Counter(
+        "http_requests_total",
+        "Число HTTP-запросов по маршруту и статусу.",
+        labels=("route", "status"),
+    )
+)
+LATENCY = registry.register(
+    Histogram(
+        "http_request_duration_seconds",
+        "Время обработки HTTP-запроса, секунды.",
+        labels=("route", "status"),
+        buckets=LATENCY_BUCKETS,
+    )
+)
+QUERIES = registry.register(
+    Counter(
+        "http_request_queries_total",
+        "Число SQL-запросов по маршруту.",
+        labels=("route",),
+    )
+)
@@ -1,5 +1,21 @@
+from hashlib import md5
+from time import perf_counter
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, connections
+from django.db.models import Count, Max
+from django.http import HttpResponse
+from django.shortcuts import get_object_or_404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
 from rest_framework import mixins, viewsets
 
+from .cache import get_changed_at, get_queryset_key, get_tables, get_versions
+
+CACHED_HEADERS = ("Content-Type", "Vary", "Allow", "ETag", "Last-Modified")
+
 
 class CreateListDestroyViewSet(
     mixins.CreateModelMixin,
@@ -9,3 +25,268 @@ class CreateListDestroyViewSet(
 ):
 
     pass
+
+
+class TimingMixin:
+    """
+    Время сериализации и рендеринга для QueryTimingMiddleware.
+
+    query_budgets - предельное число SQL-запросов по action на худшем
+    обычном пути (кэши процесса пусты), например {"list": 4}; превышение
+    попадает в журнал, тесты проверяют бюджеты в
+    api/tests/test_query_budgets.py.
+    """
+
+    query_budgets = {}
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        timings = getattr(self.request, "timings", None)
+        if timings is not None:
+            to_representation = serializer.to_representation
+
+            def timed_representation(instance):
+                with timings.serializing():
+                    return to_representation(instance)
+
+            serializer.to_representation = timed_representation
+        return serializer
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(
+            request, response, *args, **kwargs
+        )
+        timings = getattr(request, "timings", None)
+        if timings is not None and hasattr(
+            response, "add_post_render_callback"
+        ):
+            started = perf_counter()
+            response.add_post_render_callback(
+                lambda rendered: timings.rendered(started)
+            )
+        return response
+
+
+class AnonymousCacheMixin:
+    """
+    Кэширует JSON-ответы на анонимные GET-запросы.
+
+    Ключ строится из пути, отсортированной строки запроса, Accept и версий
+    таблиц cache_models, которые сдвигаются сигналами записи. Попадание
+    в кэш не обращается к базе данных.
+    """
+
+    cache_models = ()
+    response_cache_timeout = settings.RESPONSE_CACHE_TIMEOUT
+
+    def get_response_cache_key(self, request):
+        if (
+            request.method != "GET"
+            or "HTTP_AUTHORIZATION" in request.META
+            or connection.in_atomic_block
+        ):
+            return None
+        query = urlencode(
+            sorted(
+                (name, value)
+                for name, values in request.GET.lists()
+                for value in values
+            )
+        )
+        signature = (
+            request.path,
+            query,
+            request.META.get("HTTP_ACCEPT", ""),
+            get_versions(get_tables(self.cache_models)),
+        )
+        return "response:" + md5(repr(signature).encode()).hexdigest()
+
+    def dispatch(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            content, headers = cached
+            response = get_conditional_response(
+                request,
+                etag=headers.get("ETag"),
+                last_modified=parse_http_date_safe(
+                    headers.get("Last-Modified", "")
+                ),
+            )
+            if response is not None:
+                return response
+            response = HttpResponse(content)
+            for header, value in headers.items():
+                response[header] = value
+            return response
+        response = super().dispatch(request, *args, **kwargs)
+        renderer = getattr(response, "accepted_renderer", None)
+        if (
+            key is not None
+            and response.status_code == 200
+            and renderer is not None
+            and renderer.format == "json"
+        ):
+            response.add_post_render_callback(
+                lambda rendered: self.cache_response(key, rendered)
+            )
+        return response
+
+    def cache_response(self, key, response):
+        headers = {
+            header: response[header]
+            for header in CACHED_HEADERS
+            if response.has_header(header)
+        }
+        cache.set(
+            key, (response.content, headers), self.response_cache_timeout
+        )
+
+
+class ConditionalGetMixin:
+    """
+    ETag и Last-Modified для list и retrieve.
+
+    Валидаторы считаются одним запросом MAX(updated_at)/COUNT по той же
+    выборке, что и страница, плюс версии и время записи таблиц
+    cache_models: так видны удаления и правки связанных объектов.
+    Агрегат кэшируется по SQL и версиям таблиц выборки, как count
+    в CachedCountPagination, и отдается пагинации вместо COUNT.
+    Для keyset-страниц (?cursor=) COUNT не считается вовсе.
+    При совпадении If-None-Match/If-Modified-Since ответ 304 отдается
+    без сериализации.
+    """
+
+    cache_models = ()
+    queryset_count = None
+    validators_cache_timeout = settings.COUNT_CACHE_TIMEOUT
+
+    def get_validator_queryset(self):
+        queryset = self.filter_queryset(self.get_queryset())
+        if self.action == "retrieve":
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(
+                **{self.lookup_field: self.kwargs[lookup_url_kwarg]}
+            )
+        return queryset
+
+    def uses_cursor(self, request):
+        param = getattr(self.paginator, "cursor_query_param", None)
+        return param is not None and param in request.query_params
+
+    def get_validator_state(self, with_count):
+        queryset = self.get_validator_queryset().order_by()
+        aggregates = {"last_modified": Max("updated_at")}
+        if with_count:
+            aggregates["count"] = Count("pk")
+        if connections[queryset.db].in_atomic_block:
+            return queryset.aggregate(**aggregates)
+        prefix = "validators:count" if with_count else "validators"
+        key = get_queryset_key(prefix, queryset)
+        if key is None:
+            return {"last_modified": None, "count": 0}
+        state = cache.get(key)
+        if state is None:
+            state = queryset.aggregate(**aggregates)
+            cache.set(key, state, self.validators_cache_timeout)
+        return state
+
+    def get_validators(self, request):
+        with_count = self.action == "list" and not self.uses_cursor(request)
+        state = self.get_validator_state(with_count)
+        if with_count:
+            self.queryset_count = state["count"]
+        tables = get_tables(self.cache_models)
+        changes = (state["last_modified"], get_changed_at(tables))
+        last_modified = max(filter(None, changes), default=None)
+        signature = (
+            request.get_full_path(),
+            request.META.get("HTTP_ACCEPT", ""),
+            state["last_modified"],
+            state.get("count"),
+            get_versions(tables),
+        )
+        etag = '"%s"' % md5(repr(signature).encode()).hexdigest()
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        return etag, last_modified
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        etag, last_modified = self.get_validators(request)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is not None:
+            return response
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+
+class NestedResourceMixin:
+    """
+    Вложенный ресурс с родительской цепочкой в URL.
+
+    parent_lookups сопоставляет kwargs URL с полями родителя parent_model,
+    parent_field - ссылка на родителя. Выборка фильтруется по всей цепочке
+    прямо в запросе страницы (review_id и review__title_id), без отдельной
+    проверки родителя. Родитель загружается одним запросом только для
+    create и для пустого списка (чтобы отдать 404 вместо пустой страницы)
+    и кэшируется на request.
+    """
+
+    parent_model = None
+    parent_field = None
+    parent_lookups = {}
+
+    def get_parent_kwargs(self):
+        return {
+            field: self.kwargs[kwarg]
+            for kwarg, field in self.parent_lookups.items()
+        }
+
+    def get_queryset(self):
+        return (
+            super()
+            .get_queryset()
+            .filter(
+                **{
+                    f"{self.parent_field}__{field}": value
+                    for field, value in self.get_parent_kwargs().items()
+                }
+            )
+        )
+
+    def get_parent(self):
+        """Родитель из URL или 404, один запрос за request."""
+        parents = getattr(self.request, "nested_parents", None)
+        if parents is None:
+            parents = self.request.nested_parents = {}
+        kwargs = self.get_parent_kwargs()
+        key = (self.parent_model, tuple(sorted(kwargs.items())))
+        if key not in parents:
+            parents[key] = get_object_or_404(
+                self.parent_model.objects.only("id"), **kwargs
+            )
+        return parents[key]
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        if not self.queryset_count and not getattr(
+            self.paginator, "page", None
+        ):
+            self.get_parent()
+        return response
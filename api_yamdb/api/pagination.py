@@ -0,0 +1,251 @@
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from collections import OrderedDict
+from functools import reduce
+from operator import or_
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import DatabaseError, connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import LimitOffsetPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .cache import get_queryset_key
+
+ESTIMATE_SQL = {
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+    "sqlite": "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1",
+}
+
+
+def estimate_rows(table, using):
+    """Оценка числа строк из статистики планировщика, без COUNT(*)."""
+    connection = connections[using]
+    sql = ESTIMATE_SQL.get(connection.vendor)
+    if sql is None:
+        return None
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [table])
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class CachedCountPagination(LimitOffsetPagination):
+    """
+    LimitOffsetPagination с кэшированием count по сигнатуре запроса.
+
+    Ключ включает SQL с параметрами и версии всех таблиц запроса, версии
+    сдвигаются сигналами записи (api.signals). Внутри незакрытой транзакции
+    кэш не используется. Если view уже посчитал выборку (queryset_count),
+    повторного COUNT не будет. Для запросов без фильтров по таблицам больше
+    COUNT_ESTIMATE_THRESHOLD строк count берется из статистики СУБД.
+    """
+
+    count_cache_timeout = settings.COUNT_CACHE_TIMEOUT
+    count_estimate_threshold = settings.COUNT_ESTIMATE_THRESHOLD
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.known_count = getattr(view, "queryset_count", None)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset):
+        if self.known_count is not None:
+            return self.known_count
+        connection = connections[queryset.db]
+        if connection.in_atomic_block:
+            return super().get_count(queryset)
+        key = get_queryset_key("count", queryset)
+        if key is None:
+            return 0
+        count = cache.get(key)
+        if count is None:
+            count = self.get_estimated_count(queryset)
+            if count is None:
+                count = super().get_count(queryset)
+            cache.set(key, count, self.count_cache_timeout)
+        return count
+
+    def get_estimated_count(self, queryset):
+        query = queryset.query
+        if (
+            self.count_estimate_threshold is None
+            or query.where
+            or query.distinct
+            or len(query.alias_map) > 1
+        ):
+            return None
+        estimate = estimate_rows(queryset.model._meta.db_table, queryset.db)
+        if estimate is None or estimate < self.count_estimate_threshold:
+            return None
+        return estimate
+
+
+class KeysetPagination(CachedCountPagination):
+    """
+    limit/offset по умолчанию, keyset-пагинация при параметре cursor.
+
+    ?cursor= (пустое значение) открывает первую страницу, дальше клиент
+    идет по ссылкам next/previous. Страница ищется условием по полям
+    сортировки запроса (или keyset_ordering), без OFFSET и без COUNT(*).
+    NULL считается меньше любого значения, как в SQLite. Если порядок
+    задан не полями модели (например, релевантностью поиска), курсор
+    не применяется и отдается обычная limit/offset-страница.
+    """
+
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Неверный курсор"
+    keyset_ordering = ("-pub_date", "-id")
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.use_cursor = self.cursor_query_param in request.query_params
+        if self.use_cursor:
+            self.ordering = self.get_keyset_ordering(request, queryset, view)
+            try:
+                self.fields = [
+                    self.get_model_field(queryset.model, name)
+                    for name in self.ordering
+                ]
+            except FieldDoesNotExist:
+                self.use_cursor = False
+        if not self.use_cursor:
+            return super().paginate_queryset(queryset, request, view)
+        self.limit = self.get_limit(request)
+        self.request = request
+        values, reverse = self.decode_cursor(request)
+        ordering = self.ordering
+        if reverse:
+            ordering = [self.flip(name) for name in ordering]
+        queryset = queryset.order_by(*ordering)
+        if values is not None:
+            queryset = queryset.filter(self.seek(ordering, values))
+        page = list(queryset[: self.limit + 1])
+        has_more = len(page) > self.limit
+        page = page[: self.limit]
+        if reverse:
+            page.reverse()
+        self.has_next = has_more if not reverse else True
+        self.has_previous = values is not None and (has_more or not reverse)
+        self.page = page
+        return page
+
+    def get_paginated_response(self, data):
+        if not self.use_cursor:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_next_link(self):
+        if not self.use_cursor:
+            return super().get_next_link()
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.use_cursor:
+            return super().get_previous_link()
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_keyset_ordering(self, request, queryset, view):
+        """Порядок из order_by() запроса, иначе keyset_ordering."""
+        ordering = [
+            term for term in queryset.query.order_by if isinstance(term, str)
+        ]
+        return ordering or list(self.keyset_ordering)
+
+    @staticmethod
+    def flip(name):
+        return name[1:] if name.startswith("-") else f"-{name}"
+
+    @staticmethod
+    def get_model_field(model, name):
+        name = name.lstrip("-")
+        if name == "pk":
+            return model._meta.pk
+        return model._meta.get_field(name)
+
+    @staticmethod
+    def equal(field, value):
+        if value is None:
+            return Q(**{f"{field.attname}__isnull": True})
+        return Q(**{field.attname: value})
+
+    @staticmethod
+    def after(field, value, descending):
+        """Строго после value в заданном направлении; NULL меньше всех."""
+        if not descending:
+            if value is None:
+                return Q(**{f"{field.attname}__isnull": False})
+            return Q(**{f"{field.attname}__gt": value})
+        if value is None:
+            return None
+        condition = Q(**{f"{field.attname}__lt": value})
+        if field.null:
+            condition |= Q(**{f"{field.attname}__isnull": True})
+        return condition
+
+    def seek(self, ordering, values):
+        """(a, b) после (x, y): a > x OR (a = x AND b > y)."""
+        conditions = []
+        for index, name in enumerate(ordering):
+            condition = self.after(
+                self.fields[index], values[index], name.startswith("-")
+            )
+            if condition is None:
+                continue
+            for field, value in zip(self.fields[:index], values):
+                condition &= self.equal(field, value)
+            conditions.append(condition)
+        if not conditions:
+            return Q(pk__in=[])
+        return reduce(or_, conditions)
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for field in self.fields:
+            if field.value_from_object(instance) is None:
+                values.append(None)
+            else:
+                values.append(field.value_to_string(instance))
+        payload = {"o": self.ordering, "v": values, "r": reverse}
+        cursor = urlsafe_b64encode(json.dumps(payload).encode()).decode()
+        url = self.request.build_absolute_uri()
+        url = remove_query_param(url, self.offset_query_param)
+        url = replace_query_param(url, self.limit_query_param, self.limit)
+        return replace_query_param(url, self.cursor_query_param, cursor)
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None, False
+        try:
+            payload = json.loads(urlsafe_b64decode(cursor.encode()))
+            values = [
+                None if value is None else field.to_python(value)
+                for field, value in zip(self.fields, payload["v"])
+            ]
+            reverse = bool(payload["r"])
+            ordering = payload["o"]
+        except (KeyError, TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+        if ordering != self.ordering or len(values) != len(self.fields):
+            raise NotFound(self.invalid_cursor_message)
+        return values, reverse
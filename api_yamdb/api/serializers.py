@@ -1,10 +1,16 @@
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.contrib.auth.validators import UnicodeUsernameValidator
+from django.db import IntegrityError, transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from rest_framework import serializers
 
 from reviews.models import Comment, Review
 from titles.models import Category, Genre, Title
-from users.models import ROLE_CHOICES, User
+from users.models import ROLE_CHOICES, User, normalize_identifier
+
+EMAIL_TAKEN = "Email должен быть уникальным"
+USERNAME_TAKEN = "A user with that username already exists."
 
 
 class CategorySerializer(serializers.ModelSerializer):
@@ -66,34 +72,10 @@ class ReviewsSerializer(serializers.ModelSerializer):
     author = serializers.SlugRelatedField(
         read_only=True, slug_field="username"
     )
-    title = serializers.SlugRelatedField(
-        queryset=Title.objects.all(),
-        required=False,
-        slug_field="id",
-        write_only=True,
-    )
 
     class Meta:
         model = Review
-        fields = "__all__"
-
-    def get_title(self):
-        title = get_object_or_404(
-            Title, id=self.context.get("view").kwargs.get("title_id")
-        )
-        return title
-
-    def validate(self, attrs):
-        if (
-            Review.objects.filter(
-                author=self.context["request"].user, title=self.get_title()
-            ).exists()
-            and self.context["request"].method != "PATCH"
-        ):
-            raise serializers.ValidationError(
-                "Нельзя добавить второй отзыв на произведение"
-            )
-        return attrs
+        fields = ("id", "text", "author", "score", "pub_date")
 
 
 class CommentsSerializer(serializers.ModelSerializer):
@@ -107,14 +89,19 @@ class CommentsSerializer(serializers.ModelSerializer):
 
 
 class SignUpSerializer(serializers.ModelSerializer):
+    """
+    Регистрация как get-or-create.
+
+    Уникальность проверяется в validate() одним SELECT по нормализованным
+    email и username (без учета регистра): пользователь с той же парой
+    получает код повторно, занятые email или username дают 400. Создание
+    идет в транзакции, гонку ловят уникальные индексы.
+    """
+
     email = serializers.EmailField()
 
     def validate_email(self, value):
-        """Email должен быть уникальным."""
-        lower_email = value.lower()
-        if User.objects.filter(email=lower_email).exists():
-            raise serializers.ValidationError("Email должен быть уникальным")
-        return lower_email
+        return value.lower()
 
     def validate_username(self, value):
         """Использовать имя 'me' в качестве username запрещено."""
@@ -124,12 +111,52 @@ class SignUpSerializer(serializers.ModelSerializer):
             )
         return value
 
+    def validate(self, attrs):
+        self.existing = None
+        errors = {}
+        email = normalize_identifier(attrs["email"])
+        username = normalize_identifier(attrs["username"])
+        users = User.objects.filter(
+            Q(email_normalized=email) | Q(username_normalized=username)
+        )[:2]
+        for user in users:
+            same_email = user.email_normalized == email
+            same_username = user.username_normalized == username
+            if same_email and same_username:
+                self.existing = user
+            elif same_email:
+                errors["email"] = [EMAIL_TAKEN]
+            else:
+                errors["username"] = [USERNAME_TAKEN]
+        if errors:
+            raise serializers.ValidationError(errors)
+        return attrs
+
+    def create(self, validated_data):
+        if self.existing is not None:
+            return self.existing
+        try:
+            with transaction.atomic():
+                return User.objects.create(**validated_data, role="user")
+        except IntegrityError:
+            # Параллельная регистрация: повторная проверка даст 400
+            # или найдет только что созданного пользователя.
+            self.validate(validated_data)
+            return (
+                self.existing
+                or User.objects.by_username(validated_data["username"]).get()
+            )
+
     class Meta:
         model = User
         fields = (
             "email",
             "username",
         )
+        # Уникальность username проверяет validate(), без отдельного запроса.
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator()]}
+        }
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -139,19 +166,25 @@ class UserSerializer(serializers.ModelSerializer):
         default="user",
     )
 
+    def taken(self, queryset):
+        if self.instance is not None:
+            queryset = queryset.exclude(pk=self.instance.pk)
+        return queryset.exists()
+
     def validate_email(self, value):
         """Email должен быть уникальным."""
-        lower_email = value.lower()
-        if User.objects.filter(email=lower_email).exists():
-            raise serializers.ValidationError("Email должен быть уникальным")
-        return lower_email
+        if self.taken(User.objects.by_email(value)):
+            raise serializers.ValidationError(EMAIL_TAKEN)
+        return value.lower()
 
     def validate_username(self, value):
-        """Использовать имя 'me' в качестве username запрещено."""
+        """Username уникален без учета регистра, 'me' запрещено."""
         if value.lower() == "me":
             raise serializers.ValidationError(
                 "Использовать имя 'me' в качестве username запрещено."
             )
+        if self.taken(User.objects.by_username(value)):
+            raise serializers.ValidationError(USERNAME_TAKEN)
         return value
 
     class Meta:
@@ -164,6 +197,9 @@ class UserSerializer(serializers.ModelSerializer):
             "bio",
             "role",
         )
+        extra_kwargs = {
+            "username": {"validators": [UnicodeUsernameValidator()]}
+        }
 
 
 class UserMeSerializer(UserSerializer):
@@ -184,21 +220,28 @@ class CustomTokenObtainSerializer(serializers.Serializer):
     )
 
     def validate_username(self, value):
-        """Пользователь должен существовать, иначе ошибка 404"""
-        get_object_or_404(User, username=value.lower())
+        """Пользователь должен существовать, иначе ошибка 404.
+
+        Найденный пользователь сохраняется в self.user: код подтверждения
+        проверяется по нему же, а view берет его из validated_data.
+        """
+        self.user = get_object_or_404(User.objects.by_username(value))
         return value.lower()
 
     def validate_confirmation_code(self, value):
         """Валидация confirmation_code"""
         lower_confirmation_code = value.lower()
-        if self.initial_data.get("username") is None:
+        user = getattr(self, "user", None)
+        if user is None:
             raise serializers.ValidationError(
                 "Нельзя делать запрос без username"
             )
-        username = self.initial_data.get("username")
-        user = get_object_or_404(User, username=username)
         if not PasswordResetTokenGenerator().check_token(
             user, lower_confirmation_code
         ):
             raise serializers.ValidationError("Неверный код подтверждения")
         return lower_confirmation_code
+
+    def validate(self, attrs):
+        attrs["user"] = self.user
+        return attrs
@@ -0,0 +1,79 @@
+from django.db import connection, transaction
+from django.db.models.signals import (m2m_changed, post_delete, post_migrate,
+                                      post_save)
+from django.dispatch import receiver
+
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+from .authentication import revocations, revoke_user_claims, user_snapshots
+from .cache import bump_all_versions, bump_versions
+
+# Таблицы, по которым строятся закэшированные списки и ответы. Сигналы
+# без sender выключили бы быстрое удаление у всех остальных моделей.
+CACHED_MODELS = (Category, Genre, Title, Review, Comment, User)
+
+
+class PendingBump:
+    """Отложенный до коммита bump_versions, общий для строк транзакции."""
+
+    def __init__(self, tables):
+        self.tables = set(tables)
+
+    def __call__(self):
+        bump_versions(*sorted(self.tables), local=True)
+
+
+def bump_on_commit(*tables):
+    """
+    Один on_commit на транзакцию и savepoint, а не на каждую строку.
+
+    Таблицы добавляются к уже запланированному PendingBump, только если
+    он зарегистрирован в тех же savepoint: иначе откат вложенного
+    savepoint унес бы и версии внешних изменений.
+    """
+    if connection.in_atomic_block:
+        savepoints = set(connection.savepoint_ids)
+        for registered, func in reversed(connection.run_on_commit):
+            if isinstance(func, PendingBump) and registered == savepoints:
+                func.tables.update(tables)
+                return
+    transaction.on_commit(PendingBump(tables))
+
+
+def bump_model_version(sender, **kwargs):
+    bump_on_commit(sender._meta.db_table)
+
+
+for model in CACHED_MODELS:
+    post_save.connect(bump_model_version, sender=model)
+    post_delete.connect(bump_model_version, sender=model)
+
+
+@receiver(m2m_changed, sender=Title.genre.through)
+def bump_m2m_version(sender, instance, model, **kwargs):
+    bump_on_commit(
+        sender._meta.db_table,
+        instance._meta.db_table,
+        model._meta.db_table,
+    )
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_user_snapshot(sender, instance, created=False, **kwargs):
+    """Сразу и после коммита: снимок мог перечитаться до коммита."""
+    pk = instance.pk
+    if not created:
+        revoke_user_claims(pk)
+    user_snapshots.delete(pk)
+    transaction.on_commit(lambda: user_snapshots.delete(pk))
+
+
+@receiver(post_migrate)
+def bump_versions_after_flush(sender, **kwargs):
+    """flush и migrate меняют данные в обход post_save/post_delete."""
+    bump_all_versions()
+    user_snapshots.clear()
+    revocations.clear()
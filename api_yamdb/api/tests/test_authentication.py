@@ -0,0 +1,151 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.authentication import UserSnapshotCache, revocations, user_snapshots
+from api.views import CustomTokenObtainView
+from reviews.models import Review
+from titles.models import Title
+from users.models import User
+
+URL = "/api/v1/users/"
+
+
+class CachedJWTAuthenticationTest(TestCase):
+    def setUp(self):
+        user_snapshots.clear()
+        self.admin = User.objects.create_user(username="admin", role="admin")
+        self.admin_client = APIClient()
+        self.admin_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.admin)}"
+        )
+
+    def test_user_loaded_once(self):
+        """Повторный запрос с тем же токеном не читает таблицу users."""
+        self.admin_client.get(URL)
+        with self.assertNumQueries(2):
+            response = self.admin_client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_role_change_invalidates_snapshot(self):
+        self.admin_client.get(URL)
+        self.admin.role = "user"
+        self.admin.save()
+        response = self.admin_client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_deleted_and_inactive_users_rejected(self):
+        self.admin_client.get(URL)
+        self.admin.is_active = False
+        self.admin.save()
+        response = self.admin_client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.admin.delete()
+        response = self.admin_client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserSnapshotCacheTest(TestCase):
+    def test_lru_eviction_and_ttl(self):
+        snapshots = UserSnapshotCache(size=2, timeout=60)
+        snapshots.set(1, "first")
+        snapshots.set(2, "second")
+        snapshots.get(1)
+        snapshots.set(3, "third")
+        self.assertIsNone(snapshots.get(2))
+        self.assertEqual(snapshots.get(1), "first")
+        with mock.patch("api.authentication.time.monotonic") as monotonic:
+            monotonic.return_value = float("inf")
+            self.assertIsNone(snapshots.get(1))
+
+
+class TokenClaimsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", role="admin")
+        cls.author = User.objects.create_user(username="author", role="user")
+        cls.title = Title.objects.create(name="Фильм", year=2000)
+        cls.review = Review.objects.create(
+            title=cls.title, author=cls.author, text="Текст", score=5
+        )
+
+    def setUp(self):
+        cache.clear()
+        user_snapshots.clear()
+        revocations.clear()
+
+    def get_client(self, user):
+        token = CustomTokenObtainView().get_tokens_for_user(user)["token"]
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def test_token_contains_role_claims(self):
+        token = AccessToken(
+            CustomTokenObtainView().get_tokens_for_user(self.admin)["token"]
+        )
+        self.assertEqual(token["username"], "admin")
+        self.assertEqual(token["role"], "admin")
+        self.assertFalse(token["is_staff"])
+
+    def test_permissions_checked_without_user_query(self):
+        """Пользователь и права на объект берутся из токена."""
+        url = f"/api/v1/titles/{self.title.id}/reviews/{self.review.id}/"
+        client = self.get_client(self.author)
+        with CaptureQueriesContext(connection) as context:
+            response = client.patch(url, {"text": "Новый текст"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if '"users_user"' in query["sql"]
+            ]
+        )
+        response = self.get_client(self.admin).get(URL)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_role_change_revokes_claims(self):
+        """После смены роли claims старого токена не действуют."""
+        admin = User.objects.get(pk=self.admin.pk)
+        client = self.get_client(admin)
+        admin.role = "user"
+        admin.save()
+        response = client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        admin.delete()
+        response = client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_revocation_survives_cache_eviction_and_other_process(self):
+        """Отзыв хранится в базе, а не в вытесняемом кэше процесса."""
+        admin = User.objects.get(pk=self.admin.pk)
+        client = self.get_client(admin)
+        admin.role = "user"
+        admin.save()
+        for number in range(400):
+            cache.set(f"unrelated-{number}", number)
+        response = client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # Другой процесс: своих отметок нет, таблица читается заново.
+        revocations.clear()
+        user_snapshots.clear()
+        response = client.get(URL)
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_me_found_by_id_with_stale_username_claim(self):
+        client = self.get_client(self.author)
+        # Переименование в другом процессе: отметки отзыва здесь нет.
+        User.objects.filter(pk=self.author.pk).update(
+            username="renamed", username_normalized="renamed"
+        )
+        User.objects.create_user(username="author", role="user")
+        response = client.get(f"{URL}me/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["username"], "renamed")
@@ -0,0 +1,63 @@
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from reviews.models import Review
+from titles.autocomplete import title_index
+from titles.models import Title
+from users.models import User
+
+URL = "/api/v1/titles/autocomplete/"
+
+
+class TitleAutocompleteTest(TransactionTestCase):
+    def setUp(self):
+        title_index.reset()
+        self.addCleanup(title_index.reset)
+        self.guest_client = APIClient()
+        self.shawshank = Title.objects.create(
+            name="Побег из Шоушенка", year=1994
+        )
+        self.chicken_run = Title.objects.create(
+            name="Побег из курятника", year=2000
+        )
+        Title.objects.create(name="Крестный отец", year=1972)
+        Title.objects.filter(pk=self.shawshank.pk).update(rating=9)
+        Title.objects.filter(pk=self.chicken_run.pk).update(rating=7)
+
+    def suggest(self, query, **params):
+        response = self.guest_client.get(URL, {"q": query, **params})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.json()]
+
+    def test_prefix_ranked_by_rating_without_queries(self):
+        """После ленивой сборки подсказки отдаются без запросов к БД."""
+        self.assertEqual(
+            self.suggest("ПОБЕГ"), ["Побег из Шоушенка", "Побег из курятника"]
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                self.suggest("побег из к"), ["Побег из курятника"]
+            )
+            self.assertEqual(
+                self.suggest("побег", limit=1), ["Побег из Шоушенка"]
+            )
+            self.assertEqual(self.suggest("отец"), [])
+            self.assertEqual(self.suggest(""), [])
+
+    def test_index_follows_title_and_review_changes(self):
+        """Сигналы после коммита обновляют названия и рейтинг."""
+        self.suggest("побег")
+        title = Title.objects.create(name="Побег", year=1979)
+        self.assertEqual(self.suggest("побег")[-1], "Побег")
+        title.name = "Бегство"
+        title.save()
+        self.assertEqual(self.suggest("бег"), ["Бегство"])
+        self.assertNotIn("Побег", self.suggest("побег"))
+        user = User.objects.create_user(username="critic")
+        Review.objects.create(
+            title=self.chicken_run, author=user, text="!", score=10
+        )
+        self.assertEqual(self.suggest("побег")[0], "Побег из курятника")
+        title.delete()
+        self.assertEqual(self.suggest("бег"), [])
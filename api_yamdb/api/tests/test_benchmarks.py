@@ -0,0 +1,56 @@
+import random
+
+from django.test import SimpleTestCase, TestCase
+
+from benchmarks.endpoints import compare, generate, parse_args, percentile, run
+from reviews.models import Comment, Review
+from titles.models import Title
+
+
+class EndpointBenchmarkTest(TestCase):
+    def test_generated_data_drives_every_route(self):
+        """Маленький прогон: данные по seed, все маршруты отвечают 2xx."""
+        args = parse_args(
+            ["--reviews", "60", "--reviews-per-title", "6", "--genres", "5"]
+        )
+        words = generate(args, random.Random(args.seed))
+        self.assertEqual(Title.objects.count(), 10)
+        self.assertEqual(Review.objects.count(), 60)
+        self.assertTrue(Comment.objects.exists())
+        self.assertEqual(Title.objects.filter(review_count=6).count(), 10)
+        args.requests, args.warmup = 2, 0
+        routes = run(args, words, random.Random(args.seed))
+        self.assertIn("comments.partial_update", routes)
+        self.assertIn("auth.token", routes)
+        for route, result in routes.items():
+            self.assertEqual(result["count"], 2, route)
+            self.assertTrue(
+                all(status < 400 for status in result["statuses"]), route
+            )
+
+
+class CompareTest(SimpleTestCase):
+    def result(self, p95, queries):
+        return {
+            "routes": {"titles.list": {"p95_ms": p95, "max_queries": queries}}
+        }
+
+    def test_percentile_nearest_rank(self):
+        values = list(range(1, 101))
+        self.assertEqual(percentile(values, 0.5), 50)
+        self.assertEqual(percentile(values, 0.99), 99)
+        self.assertEqual(percentile([7], 0.95), 7)
+
+    def test_regressions_flagged(self):
+        baseline = self.result(10.0, 3)
+        self.assertEqual(compare(baseline, self.result(11.5, 3), 0.2, 1), [])
+        self.assertEqual(
+            compare(baseline, self.result(13.0, 4), 0.2, 1),
+            [
+                "titles.list: p95 10.0 -> 13.0 мс",
+                "titles.list: SQL 3 -> 4",
+            ],
+        )
+        self.assertEqual(
+            compare(self.result(0.5, 3), self.result(0.9, 3), 0.2, 1), []
+        )
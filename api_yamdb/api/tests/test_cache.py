@@ -0,0 +1,181 @@
+import os
+import subprocess
+import sys
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.signals import PendingBump
+from reviews.models import Review
+from titles.models import Category, Genre, NameTrigram, Title
+from users.models import User
+
+TEST_GENRE_FIELDS: dict = {"name": "Ужасы", "slug": "horror"}
+
+TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
+
+
+class AnonymousCacheTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(username="auth", role="user")
+        self.genre = Genre.objects.create(**TEST_GENRE_FIELDS)
+        self.category = Category.objects.create(**TEST_CATEGORY_FIELDS)
+        self.title = Title.objects.create(
+            name="Кошмар на улице Вязов", year=1984, category=self.category
+        )
+        self.title.genre.set([self.genre])
+        self.guest_client = APIClient()
+        self.authorized_client = APIClient()
+        self.authorized_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(self.user)}"
+        )
+
+    def test_anonymous_hit_skips_database(self):
+        """Повторный анонимный GET отдается из кэша без запросов к БД."""
+        url = f"/api/v1/titles/{self.title.id}/"
+        first = self.guest_client.get(url)
+        with self.assertNumQueries(0):
+            second = self.guest_client.get(url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second["Content-Type"], first["Content-Type"])
+
+    def test_query_string_is_normalized(self):
+        """Порядок параметров запроса не влияет на ключ кэша."""
+        self.guest_client.get("/api/v1/titles/?year=1984&limit=5")
+        with self.assertNumQueries(0):
+            self.guest_client.get("/api/v1/titles/?limit=5&year=1984")
+
+    def test_review_invalidates_title_rating(self):
+        """Новый отзыв сбрасывает закэшированный рейтинг произведения."""
+        url = f"/api/v1/titles/{self.title.id}/"
+        self.assertIsNone(self.guest_client.get(url).json()["rating"])
+        Review.objects.create(
+            title=self.title, text="Отзыв", score=8, author=self.user
+        )
+        self.assertEqual(self.guest_client.get(url).json()["rating"], 8)
+
+    def test_rebuild_ratings_invalidates_titles(self):
+        """rebuild_ratings пишет update() мимо сигналов и сбрасывает кэш."""
+        Review.objects.create(
+            title=self.title, text="Отзыв", score=8, author=self.user
+        )
+        Title.objects.update(score_sum=0, review_count=0, rating=None)
+        url = f"/api/v1/titles/{self.title.id}/"
+        autocomplete = "/api/v1/titles/autocomplete/?q=кошмар"
+        self.assertIsNone(self.guest_client.get(url).json()["rating"])
+        self.assertIsNone(
+            self.guest_client.get(autocomplete).json()[0]["rating"]
+        )
+        call_command("rebuild_ratings", stdout=StringIO())
+        self.assertEqual(self.guest_client.get(url).json()["rating"], 8)
+        self.assertEqual(
+            self.guest_client.get(autocomplete).json()[0]["rating"], 8
+        )
+
+    def test_versions_shared_between_processes(self):
+        """Версия, сброшенная другим процессом, сбрасывает кэш этого."""
+        url = f"/api/v1/titles/{self.title.id}/"
+        autocomplete = "/api/v1/titles/autocomplete/?q=кошмар"
+        self.assertIsNone(self.guest_client.get(url).json()["rating"])
+        self.assertIsNone(
+            self.guest_client.get(autocomplete).json()[0]["rating"]
+        )
+        Title.objects.filter(pk=self.title.pk).update(rating=8)
+        self.assertIsNone(self.guest_client.get(url).json()["rating"])
+        subprocess.run(
+            [
+                sys.executable,
+                "-c",
+                "import django; django.setup(); "
+                "from api.cache import bump_versions; "
+                f"bump_versions({Title._meta.db_table!r})",
+            ],
+            cwd=settings.BASE_DIR,
+            env={
+                **os.environ,
+                "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE,
+            },
+            check=True,
+        )
+        self.assertEqual(self.guest_client.get(url).json()["rating"], 8)
+        self.assertEqual(
+            self.guest_client.get(autocomplete).json()[0]["rating"], 8
+        )
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            },
+            "versions": {
+                "BACKEND": "django.core.cache.backends.locmem.LocMemCache"
+            },
+        }
+    )
+    def test_commands_require_shared_versions(self):
+        """Без общего кэша версий команды отказываются работать."""
+        for command in ("rebuild_ratings", "import_csv"):
+            with self.subTest(command=command):
+                with self.assertRaisesMessage(CommandError, "VERSIONS_CACHE"):
+                    call_command(command, stdout=StringIO())
+        self.assertIsNone(Title.objects.get(pk=self.title.pk).rating)
+
+    def test_genre_change_invalidates_lists(self):
+        """Изменение жанров сбрасывает списки жанров и произведений."""
+        self.guest_client.get("/api/v1/genres/")
+        self.guest_client.get("/api/v1/titles/")
+        drama = Genre.objects.create(name="Драма", slug="drama")
+        self.title.genre.add(drama)
+        response = self.guest_client.get("/api/v1/genres/")
+        self.assertEqual(response.json()["count"], 2)
+        response = self.guest_client.get("/api/v1/titles/")
+        self.assertEqual(len(response.json()["results"][0]["genre"]), 2)
+
+    def test_authenticated_requests_bypass_cache(self):
+        """Запросы с токеном не читают и не пишут кэш ответов."""
+        url = "/api/v1/categories/"
+        self.guest_client.get(url)
+        with self.assertNumQueries(2):
+            response = self.authorized_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_untracked_models_keep_fast_delete(self):
+        """Триграммы удаляются одним DELETE, без сигналов по строкам."""
+        trigrams = NameTrigram.objects.for_instance(self.title)
+        self.assertTrue(trigrams.exists())
+        with CaptureQueriesContext(connection) as context:
+            trigrams.delete()
+        self.assertEqual(
+            [
+                query["sql"].split()[0]
+                for query in context.captured_queries
+                if query["sql"] != "BEGIN"
+            ],
+            ["DELETE"],
+        )
+
+    def test_one_bump_per_transaction(self):
+        for number in range(3):
+            Review.objects.create(
+                title=self.title,
+                author=User.objects.create_user(username=f"r{number}"),
+                text="Отзыв",
+                score=5,
+            )
+        with transaction.atomic():
+            self.title.delete()
+            bumps = [
+                func
+                for _, func in connection.run_on_commit
+                if isinstance(func, PendingBump)
+            ]
+        self.assertEqual(len(bumps), 1)
+        self.assertIn(Review._meta.db_table, bumps[0].tables)
@@ -14,6 +14,10 @@ TEST_GENRE_FIELDS: dict = {"name": "Ужасы", "slug": "horror"}
 
 TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
 
+# Валидаторы и страница комментариев: цепочка title/review проверяется
+# в тех же запросах, отдельного запроса отзыва нет.
+COMMENT_LIST_QUERIES = 2
+
 
 class CommentViewsTest(TestCase):
     @classmethod
@@ -79,3 +83,51 @@ class CommentViewsTest(TestCase):
             data=data,
         )
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_comments_list_query_count_does_not_grow(self):
+        """Авторы загружаются вместе со страницей комментариев."""
+        User.objects.bulk_create(
+            User(username=f"author_{number}") for number in range(1000)
+        )
+        Comment.objects.bulk_create(
+            Comment(review=self.review, text="Комментарий", author=author)
+            for author in User.objects.filter(username__startswith="author_")
+        )
+        url = f"/api/v1/titles/{self.title.id}/reviews/{self.review.id}/"
+        for limit in (10, 100, 1000):
+            with self.assertNumQueries(COMMENT_LIST_QUERIES):
+                response = self.client.get(f"{url}comments/", {"limit": limit})
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()["results"]), limit)
+
+    def test_comments_parent_chain_checked(self):
+        """Отзыв другого произведения или пустой несуществующий - 404."""
+        other = Title.objects.create(name="Другое", year=2000)
+        for url in (
+            f"/api/v1/titles/{other.id}/reviews/{self.review.id}/comments/",
+            f"/api/v1/titles/{self.title.id}/reviews/0/comments/",
+        ):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+            response = self.authorized_client.post(url, {"text": "Текст"})
+            self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+        response = self.client.get(
+            f"/api/v1/titles/{other.id}/reviews/{self.review.id}"
+            f"/comments/{self.comment.id}/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_empty_comments_list_checks_review(self):
+        """Пустой список: агрегат и проверка отзыва, страница не читается."""
+        review = Review.objects.create(
+            title=self.title,
+            text="Без комментариев",
+            score=3,
+            author=self.user,
+        )
+        with self.assertNumQueries(2):
+            response = self.client.get(
+                f"/api/v1/titles/{self.title.id}/reviews/{review.id}/comments/"
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["results"], [])
@@ -0,0 +1,136 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+TEST_USER_FIELDS: dict = {"username": "auth", "role": "user"}
+
+TEST_GENRE_FIELDS: dict = {"name": "Ужасы", "slug": "horror"}
+
+TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
+
+
+class ConditionalGetTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(**TEST_USER_FIELDS)
+        cls.genre = Genre.objects.create(**TEST_GENRE_FIELDS)
+        cls.category = Category.objects.create(**TEST_CATEGORY_FIELDS)
+        cls.title = Title.objects.create(
+            name="Кошмар на улице Вязов", year=1984, category=cls.category
+        )
+        cls.title.genre.set([cls.genre])
+        cls.review = Review.objects.create(
+            title=cls.title, text="Отзыв №1", score=5, author=cls.user
+        )
+        Comment.objects.create(
+            review=cls.review, text="Шедеврально", author=cls.user
+        )
+        cls.comments_url = (
+            f"/api/v1/titles/{cls.title.id}/"
+            f"reviews/{cls.review.id}/comments/"
+        )
+
+    def setUp(self):
+        self.guest_client = APIClient()
+
+    def test_titles_list_if_none_match(self):
+        """Совпавший ETag списка произведений дает 304."""
+        response = self.guest_client.get("/api/v1/titles/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.guest_client.get(
+            "/api/v1/titles/", HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_title_detail_changes_with_rating(self):
+        """Новый отзыв меняет ETag произведения."""
+        url = f"/api/v1/titles/{self.title.id}/"
+        etag = self.guest_client.get(url)["ETag"]
+        author = User.objects.create_user(username="reader")
+        Review.objects.create(
+            title=self.title, text="Отзыв №2", score=9, author=author
+        )
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["rating"], 7)
+
+    def test_nested_comments_not_modified_without_serialization(self):
+        """304 для комментариев: один агрегат, без отзыва и страницы."""
+        response = self.guest_client.get(self.comments_url)
+        self.assertIn("Last-Modified", response)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(
+                self.comments_url,
+                HTTP_IF_MODIFIED_SINCE=response["Last-Modified"],
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_nested_comments_modified_after_new_comment(self):
+        """Новый комментарий меняет ETag списка комментариев."""
+        etag = self.guest_client.get(self.comments_url)["ETag"]
+        Comment.objects.create(
+            review=self.review, text="Согласен", author=self.user
+        )
+        response = self.guest_client.get(
+            self.comments_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 2)
+
+
+class CachedValidatorsTest(TransactionTestCase):
+    """Агрегат валидаторов кэшируется; в режиме cursor нет COUNT."""
+
+    def setUp(self):
+        cache.clear()
+        user = User.objects.create_user(**TEST_USER_FIELDS)
+        title = Title.objects.create(name="Кошмар", year=1984)
+        review = Review.objects.create(
+            title=title, text="Отзыв №1", score=5, author=user
+        )
+        Comment.objects.create(review=review, text="Шедеврально", author=user)
+        self.review = review
+        self.user = user
+        self.comments_url = (
+            f"/api/v1/titles/{title.id}/reviews/{review.id}/comments/"
+        )
+        self.guest_client = APIClient()
+
+    def test_cursor_page_without_count(self):
+        url = "/api/v1/titles/?cursor=&limit=2"
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(
+            [
+                query["sql"]
+                for query in context.captured_queries
+                if "COUNT(" in query["sql"]
+            ]
+        )
+
+    def test_validators_cached_until_write(self):
+        response = self.guest_client.get(self.comments_url)
+        with self.assertNumQueries(0):
+            response = self.guest_client.get(
+                self.comments_url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        with self.assertNumQueries(1):
+            response = self.guest_client.get(self.comments_url)
+        self.assertEqual(response.json()["count"], 1)
+        Comment.objects.create(
+            review=self.review, text="Согласен", author=self.user
+        )
+        response = self.guest_client.get(
+            self.comments_url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 2)
@@ -0,0 +1,98 @@
+import csv
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.models import User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "static", "data")
+
+
+def read_data_file(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as source:
+        return source.read()
+
+
+def parse_rows(content):
+    """Заголовок и строки по возрастанию id: файлы не всегда упорядочены."""
+    header, *rows = csv.reader(StringIO(content))
+    return header, sorted(rows, key=lambda row: int(row[0]))
+
+
+class ExportTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        directory = tempfile.mkdtemp()
+        call_command(
+            "import_csv",
+            state_file=os.path.join(directory, "state.json"),
+            stdout=StringIO(),
+        )
+        os.rmdir(directory)
+        cls.admin_user = User.objects.get(username="capt_obvious")
+        cls.user = User.objects.get(username="bingobongo")
+
+    def setUp(self):
+        self.admin_client = APIClient()
+        self.admin_client.force_authenticate(self.admin_user)
+        self.authorized_client = APIClient()
+        self.authorized_client.force_authenticate(self.user)
+
+    def test_export_csv_matches_static_data(self):
+        """CSV-выгрузка совпадает с исходными файлами static/data."""
+        for dataset, filename in (
+            ("category", "category.csv"),
+            ("titles", "titles.csv"),
+            ("review", "review.csv"),
+        ):
+            response = self.admin_client.get(f"/api/v1/export/{dataset}.csv")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertTrue(response.streaming)
+            content = b"".join(response.streaming_content).decode()
+            self.assertEqual(
+                parse_rows(content), parse_rows(read_data_file(filename))
+            )
+
+    def test_export_ndjson(self):
+        """NDJSON: один объект на строку с колонками static/data."""
+        response = self.admin_client.get("/api/v1/export/comments.ndjson")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertEqual(
+            list(json.loads(lines[0])),
+            ["id", "review_id", "text", "author", "pub_date"],
+        )
+
+    def test_export_admin_only(self):
+        """Выгрузка доступна только администратору."""
+        response = self.authorized_client.get("/api/v1/export/review.csv")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        response = self.admin_client.get("/api/v1/export/unknown.csv")
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_export_command(self):
+        """Команда export_data пишет файлы в раскладке static/data."""
+        with tempfile.TemporaryDirectory() as directory:
+            call_command(
+                "export_data",
+                "genre",
+                "genre_title",
+                output=directory,
+                chunk_size=7,
+                stdout=StringIO(),
+            )
+            for filename in ("genre.csv", "genre_title.csv"):
+                path = os.path.join(directory, filename)
+                with open(path, encoding="utf-8") as exported:
+                    self.assertEqual(
+                        parse_rows(exported.read()),
+                        parse_rows(read_data_file(filename)),
+                    )
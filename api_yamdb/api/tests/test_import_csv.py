@@ -0,0 +1,141 @@
+import csv
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import CommandError, call_command
+from django.test import TestCase
+
+from reviews.models import Comment, Review
+from titles.models import Title
+from users.models import User
+
+DATA_DIR = os.path.join(settings.BASE_DIR, "static", "data")
+
+
+def count_rows(filename):
+    with open(os.path.join(DATA_DIR, filename), encoding="utf-8") as source:
+        return sum(1 for _ in csv.DictReader(source))
+
+
+def read_version_elsewhere():
+    """Общая версия таблиц глазами другого процесса, например веб-сервера."""
+    return subprocess.run(
+        [
+            sys.executable,
+            "-c",
+            "import django; django.setup(); "
+            "from api.cache import get_versions; print(get_versions([]))",
+        ],
+        cwd=settings.BASE_DIR,
+        env={**os.environ, "DJANGO_SETTINGS_MODULE": settings.SETTINGS_MODULE},
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+class ImportCsvTest(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.state_file = os.path.join(directory, "state.json")
+        self.addCleanup(os.rmdir, directory)
+
+    def import_csv(self, **options):
+        output = StringIO()
+        call_command(
+            "import_csv",
+            state_file=self.state_file,
+            chunk_size=10,
+            stdout=output,
+            **options,
+        )
+        return output.getvalue()
+
+    def test_import_all_files(self):
+        """Все строки загружены, pub_date из файла, рейтинг пересчитан."""
+        version = read_version_elsewhere()
+        self.import_csv()
+        self.assertNotEqual(read_version_elsewhere(), version)
+        self.assertEqual(User.objects.count(), count_rows("users.csv"))
+        self.assertEqual(Title.objects.count(), count_rows("titles.csv"))
+        self.assertEqual(Review.objects.count(), count_rows("review.csv"))
+        self.assertEqual(Comment.objects.count(), count_rows("comments.csv"))
+        self.assertEqual(Review.objects.get(pk=1).pub_date.year, 2019)
+        title = Title.objects.get(pk=1)
+        scores = list(title.reviews.values_list("score", flat=True))
+        self.assertEqual(title.review_count, len(scores))
+        self.assertEqual(title.rating, sum(scores) // len(scores))
+        self.assertFalse(os.path.exists(self.state_file))
+
+    def test_import_fills_name_search(self):
+        """Нормализованные имена и триграммы заполняются при импорте."""
+        self.import_csv()
+        title = Title.objects.get(pk=1)
+        self.assertEqual(title.name_normalized, title.name.casefold())
+        self.assertEqual(
+            list(Title.objects.name_contains(title.name.upper())), [title]
+        )
+
+    def test_resume_skips_committed_chunks(self):
+        """--resume продолжает с первой незагруженной порции.
+
+        Порция 31-40 закоммичена, но прогресс записан до нее: она
+        повторяется без конфликтов и не попадает в число загруженных.
+        """
+        self.import_csv()
+        reviews_done = 30
+        with open(
+            os.path.join(DATA_DIR, "review.csv"), encoding="utf-8"
+        ) as source:
+            ids = [row["id"] for row in csv.DictReader(source)]
+        committed = reviews_done + 10
+        Review.objects.filter(id__in=ids[committed:]).delete()
+        Comment.objects.all().delete()
+        Review.objects.filter(id=ids[0]).update(text="Уже загружен")
+        with open(self.state_file, "w", encoding="utf-8") as state_file:
+            json.dump(
+                {
+                    "rows": {"review.csv": reviews_done},
+                    "done": [
+                        "users.csv",
+                        "category.csv",
+                        "genre.csv",
+                        "titles.csv",
+                        "genre_title.csv",
+                    ],
+                },
+                state_file,
+            )
+        output = self.import_csv(resume=True)
+        self.assertIn(f"review.csv: {len(ids) - committed} строк", output)
+        self.assertEqual(Review.objects.count(), len(ids))
+        self.assertEqual(Comment.objects.count(), count_rows("comments.csv"))
+        self.assertEqual(Review.objects.get(id=ids[0]).text, "Уже загружен")
+
+    def test_conflicting_rows_stop_import(self):
+        """Дубликат отзыва не теряется молча, а останавливает импорт."""
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for filename in os.listdir(DATA_DIR):
+            shutil.copy(os.path.join(DATA_DIR, filename), directory)
+        path = os.path.join(directory, "review.csv")
+        with open(path, encoding="utf-8") as source:
+            rows = list(csv.DictReader(source))
+        duplicate = dict(rows[0], id=str(max(int(r["id"]) for r in rows) + 1))
+        with open(path, "a", encoding="utf-8", newline="") as target:
+            target.write("\n")
+            csv.DictWriter(target, fieldnames=list(duplicate)).writerow(
+                duplicate
+            )
+        self.addCleanup(os.remove, self.state_file)
+        version = read_version_elsewhere()
+        with self.assertRaisesMessage(CommandError, "review.csv: строки"):
+            self.import_csv(path=directory)
+        # Загруженные до сбоя порции уже видны другим процессам.
+        self.assertNotEqual(read_version_elsewhere(), version)
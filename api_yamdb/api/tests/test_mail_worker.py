@@ -0,0 +1,92 @@
+from io import StringIO
+from unittest import mock
+
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from users.mail import enqueue_mail
+from users.models import OutgoingEmail
+
+
+@override_settings(EMAIL_OUTBOX_EAGER=False)
+class MailWorkerTest(TestCase):
+    def run_worker(self):
+        call_command("run_mail_worker", once=True, stdout=StringIO())
+
+    def test_signup_only_enqueues(self):
+        """Signup пишет письмо в очередь, отправляет его воркер."""
+        response = APIClient().post(
+            "/api/v1/auth/signup/",
+            {"email": "test@mail.ru", "username": "testusername"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(mail.outbox), 0)
+        email = OutgoingEmail.objects.get()
+        self.assertEqual(email.recipients, "test@mail.ru")
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ["test@mail.ru"])
+        email.refresh_from_db()
+        self.assertIsNotNone(email.sent_at)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_OUTBOX_EAGER=True)
+    def test_eager_send_keeps_record(self):
+        """Сразу отправленное письмо тоже остается в очереди."""
+        enqueue_mail("Код", "123", "from@example.com", ["test@mail.ru"])
+        self.assertEqual(len(mail.outbox), 1)
+        email = OutgoingEmail.objects.get()
+        self.assertIsNotNone(email.sent_at)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+
+    @override_settings(EMAIL_OUTBOX_EAGER=True)
+    def test_failed_eager_send_left_for_worker(self):
+        """Если сразу отправить не вышло, письмо отправит воркер."""
+        with mock.patch.object(
+            EmailBackend, "send_messages", side_effect=ConnectionError
+        ):
+            with self.assertRaises(ConnectionError):
+                enqueue_mail(
+                    "Код", "123", "from@example.com", ["test@mail.ru"]
+                )
+        self.assertIsNone(OutgoingEmail.objects.get().sent_at)
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_failed_message_retried_later(self):
+        """Ошибка одного письма не мешает остальным и дает паузу."""
+        for number in range(3):
+            OutgoingEmail.objects.create(
+                subject="Код",
+                body=str(number),
+                from_email="from@example.com",
+                recipients=f"user{number}@mail.ru",
+            )
+        send_messages = EmailBackend.send_messages
+
+        def fail_second(backend, messages):
+            if messages[0].body == "1":
+                raise ConnectionError("SMTP недоступен")
+            return send_messages(backend, messages)
+
+        with mock.patch.object(EmailBackend, "send_messages", fail_second):
+            self.run_worker()
+        self.assertEqual(len(mail.outbox), 2)
+        failed = OutgoingEmail.objects.get(sent_at__isnull=True)
+        self.assertEqual(failed.body, "1")
+        self.assertEqual(failed.attempts, 1)
+        self.assertIn("SMTP", failed.last_error)
+        self.assertGreater(failed.next_attempt_at, timezone.now())
+        OutgoingEmail.objects.filter(pk=failed.pk).update(
+            next_attempt_at=timezone.now()
+        )
+        self.run_worker()
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertFalse(OutgoingEmail.objects.filter(sent_at__isnull=True))
@@ -0,0 +1,93 @@
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core import mail
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from users.maillog import (LOG_NAME, MailLog, MailLogBackend, find_latest,
+                           get_mail_log, iter_lines_reversed)
+
+
+class MailLogBackendTest(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.addCleanup(get_mail_log(self.directory).close)
+
+    def send(self, body, to):
+        connection = MailLogBackend(file_path=self.directory)
+        mail.send_mail(
+            "Код", body, "from@example.com", [to], connection=connection
+        )
+
+    def test_latest_message_for_address(self):
+        """Все письма в одном файле, ищется последнее на адрес."""
+        self.send("first", "user@mail.ru")
+        self.send("other", "other@mail.ru")
+        self.send("second", "User@Mail.ru")
+        self.assertEqual(os.listdir(self.directory), [LOG_NAME])
+        record = find_latest("user@mail.ru", self.directory)
+        self.assertEqual(record["body"], "second")
+        self.assertIsNone(find_latest("nobody@mail.ru", self.directory))
+        output = StringIO()
+        call_command(
+            "find_mail",
+            "other@mail.ru",
+            path=self.directory,
+            body_only=True,
+            stdout=output,
+        )
+        self.assertEqual(output.getvalue().strip(), "other")
+
+    def test_reverse_reading_across_blocks(self):
+        for number in range(5):
+            self.send(f"code {number}", "user@mail.ru")
+        path = os.path.join(self.directory, LOG_NAME)
+        with open(path, "rb") as source:
+            lines = source.read().splitlines()
+        self.assertEqual(
+            list(iter_lines_reversed(path, block_size=7)), lines[::-1]
+        )
+
+    @override_settings(EMAIL_LOG_BACKUPS=2)
+    def test_rotation_keeps_backups(self):
+        """По размеру файл сдвигается, старше EMAIL_LOG_BACKUPS удаляются."""
+        log = MailLog(self.directory, 200, 2, fsync_interval=0)
+        self.addCleanup(log.close)
+        for number in range(10):
+            log.append(
+                [
+                    {
+                        "to": [f"user{number}@mail.ru"],
+                        "body": "x" * 50,
+                    }
+                ]
+            )
+        self.assertEqual(
+            sorted(os.listdir(self.directory)),
+            [LOG_NAME, f"{LOG_NAME}.1", f"{LOG_NAME}.2"],
+        )
+        self.assertIsNotNone(find_latest("user9@mail.ru", self.directory))
+        self.assertIsNotNone(find_latest("user4@mail.ru", self.directory))
+        self.assertIsNone(find_latest("user0@mail.ru", self.directory))
+
+    def test_rotation_by_another_process(self):
+        """Второй процесс после чужой ротации пишет в новый mail.ndjson."""
+        first = MailLog(self.directory, 200, 5, fsync_interval=0)
+        second = MailLog(self.directory, 200, 5, fsync_interval=0)
+        self.addCleanup(first.close)
+        self.addCleanup(second.close)
+        for number in range(12):
+            log = (first, second)[number % 2]
+            log.append([{"to": ["user@mail.ru"], "body": f"code {number}"}])
+        self.assertEqual(
+            find_latest("user@mail.ru", self.directory)["body"], "code 11"
+        )
+        lines = []
+        for name in os.listdir(self.directory):
+            with open(os.path.join(self.directory, name), "rb") as source:
+                lines.extend(source.read().splitlines())
+        self.assertEqual(len(lines), 12)
@@ -0,0 +1,96 @@
+import threading
+
+from django.test import SimpleTestCase, TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.metrics import CONTENT_TYPE, Counter, Histogram, registry
+from users.models import User
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    def test_histogram_buckets_cumulative(self):
+        histogram = Histogram(
+            "latency", "Задержка", labels=("route",), buckets=(0.1, 1)
+        )
+        for value in (0.05, 0.1, 0.5, 3):
+            histogram.observe(value, "titles.list")
+        self.assertEqual(
+            histogram.collect()[2:],
+            [
+                'latency_bucket{route="titles.list",le="0.1"} 2',
+                'latency_bucket{route="titles.list",le="1.0"} 3',
+                'latency_bucket{route="titles.list",le="+Inf"} 4',
+                'latency_sum{route="titles.list"} 3.65',
+                'latency_count{route="titles.list"} 4',
+            ],
+        )
+
+    def test_label_values_escaped(self):
+        counter = Counter("hits", "Запросы", labels=("route",))
+        counter.inc('a"b\\c')
+        self.assertEqual(counter.collect()[-1], r'hits{route="a\"b\\c"} 1')
+
+    def test_concurrent_updates_not_lost(self):
+        counter = Counter("hits", "Запросы", labels=("route",))
+        histogram = Histogram("latency", "Задержка", buckets=(1,))
+
+        def work():
+            for _ in range(2000):
+                counter.inc("titles.list")
+                histogram.observe(0.5)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(counter.snapshot(), [(("titles.list",), 16000)])
+        self.assertIn("latency_count 16000", histogram.collect())
+
+
+class MetricsViewTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(username="admin", role="admin")
+        cls.user = User.objects.create_user(username="user", role="user")
+
+    def setUp(self):
+        registry.reset()
+
+    def get_client(self, user):
+        client = APIClient()
+        client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}"
+        )
+        return client
+
+    def test_metrics_admin_only(self):
+        response = APIClient().get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.get_client(self.user).get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_requests_counted_by_route_and_status(self):
+        client = APIClient()
+        client.get("/api/v1/titles/")
+        client.get("/api/v1/titles/")
+        client.get("/api/v1/titles/0/")
+        response = self.get_client(self.admin).get("/metrics")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response["Content-Type"], CONTENT_TYPE)
+        lines = response.content.decode().splitlines()
+        self.assertIn(
+            'http_requests_total{route="title.list",status="200"} 2', lines
+        )
+        self.assertIn(
+            'http_requests_total{route="title.retrieve",status="404"} 1',
+            lines,
+        )
+        self.assertIn(
+            'http_request_duration_seconds_count{route="title.list",'
+            'status="200"} 2',
+            lines,
+        )
+        self.assertIn("# TYPE http_request_duration_seconds histogram", lines)
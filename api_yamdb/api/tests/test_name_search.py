@@ -0,0 +1,79 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from titles.models import Category, Genre, NameTrigram, Title
+
+
+class NameSearchTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.guest_client = APIClient()
+        Title.objects.create(name="Побег из Шоушенка", year=1994)
+        Title.objects.create(name="Крестный отец", year=1972)
+        Title.objects.create(name="ОТЕЦ невесты", year=1991)
+        Category.objects.create(name="Фильм", slug="films")
+        Category.objects.create(name="Книга", slug="books")
+        Genre.objects.create(name="Драма", slug="drama")
+        Genre.objects.create(name="Мелодрама", slug="melodrama")
+
+    def get_names(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item["name"] for item in response.json()["results"])
+
+    def test_title_name_filter_ignores_cyrillic_case(self):
+        """?name= находит подстроку без учета регистра кириллицы."""
+        self.assertEqual(
+            self.get_names("/api/v1/titles/", name="отец"),
+            ["Крестный отец", "ОТЕЦ невесты"],
+        )
+        self.assertEqual(
+            self.get_names("/api/v1/titles/", name="ШОУ"),
+            ["Побег из Шоушенка"],
+        )
+        self.assertEqual(
+            self.get_names("/api/v1/titles/", name="ЕЦ"),
+            ["Крестный отец", "ОТЕЦ невесты"],
+        )
+        self.assertEqual(
+            self.get_names("/api/v1/titles/", name="ЕЦ Н"), ["ОТЕЦ невесты"]
+        )
+        self.assertEqual(self.get_names("/api/v1/titles/", name="отцы"), [])
+
+    def test_category_and_genre_search(self):
+        """SearchFilter категорий и жанров не зависит от регистра."""
+        self.assertEqual(
+            self.get_names("/api/v1/categories/", search="фИЛЬ"), ["Фильм"]
+        )
+        self.assertEqual(
+            self.get_names("/api/v1/genres/", search="ДРАМА"),
+            ["Драма", "Мелодрама"],
+        )
+
+    def test_name_startswith_uses_prefix(self):
+        self.assertEqual(
+            list(
+                Genre.objects.name_startswith("дра").values_list(
+                    "slug", flat=True
+                )
+            ),
+            ["drama"],
+        )
+
+    def test_trigrams_follow_changes(self):
+        """Триграммы пересобираются при переименовании и удалении."""
+        genre = Genre.objects.get(slug="drama")
+        genre.name = "Комедия"
+        genre.save()
+        self.assertEqual(genre.name_normalized, "комедия")
+        self.assertEqual(list(Genre.objects.name_contains("МЕДИ")), [genre])
+        self.assertFalse(
+            Genre.objects.name_contains("драма").filter(pk=genre.pk)
+        )
+        genre.delete()
+        self.assertFalse(
+            NameTrigram.objects.filter(
+                model_name="genre", object_id=genre.id
+            ).exists()
+        )
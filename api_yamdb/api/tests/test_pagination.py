@@ -0,0 +1,58 @@
+from unittest import mock
+
+from django.db import connection
+from django.test import TransactionTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from api.pagination import CachedCountPagination
+from titles.models import Category
+from users.models import User
+
+TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
+
+
+class CachedCountPaginationTest(TransactionTestCase):
+    def setUp(self):
+        Category.objects.create(**TEST_CATEGORY_FIELDS)
+        Category.objects.create(name="Книги", slug="books")
+        self.guest_client = APIClient()
+        admin_user = User.objects.create_user(username="admin", role="admin")
+        self.admin_client = APIClient()
+        self.admin_client.credentials(
+            HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(admin_user)}"
+        )
+
+    def test_count_cached_until_write(self):
+        """Повторный запрос страницы обходится без COUNT(*)."""
+        url = "/api/v1/categories/"
+        with self.assertNumQueries(3):
+            self.admin_client.get(url)
+        with self.assertNumQueries(1):
+            response = self.admin_client.get(url)
+        self.assertEqual(response.json()["count"], 2)
+        Category.objects.create(name="Музыка", slug="music")
+        with self.assertNumQueries(2):
+            response = self.admin_client.get(url)
+        self.assertEqual(response.json()["count"], 3)
+
+    def test_count_cached_per_filter(self):
+        """У каждого набора фильтров свой закэшированный count."""
+        response = self.guest_client.get("/api/v1/categories/?search=Фил")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["count"], 1)
+        response = self.guest_client.get("/api/v1/categories/")
+        self.assertEqual(response.json()["count"], 2)
+
+    def test_estimated_count_for_large_tables(self):
+        """Без фильтров count большой таблицы берется из статистики."""
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        Category.objects.create(name="Музыка", slug="music")
+        with mock.patch.object(
+            CachedCountPagination, "count_estimate_threshold", 1
+        ):
+            response = self.guest_client.get("/api/v1/categories/")
+        self.assertEqual(response.json()["count"], 2)
+        self.assertEqual(len(response.json()["results"]), 3)
@@ -0,0 +1,256 @@
+import json
+
+from django.contrib.auth.tokens import PasswordResetTokenGenerator
+from django.core.cache import cache
+from django.test import TransactionTestCase
+from rest_framework.test import APIClient
+
+from api.authentication import revocations, user_snapshots
+from api.urls import router
+from api.views import CustomTokenObtainView
+from reviews.models import Comment, Review
+from titles.models import Category, Genre, Title
+from users.models import User
+
+
+class QueryBudgetTest(TransactionTestCase):
+    """
+    Бюджеты query_budgets view с учетом аутентификации и middleware.
+
+    Число запросов берется из request.timings (QueryTimingMiddleware),
+    то есть считаются все SQL-запросы, а не только запросы view.
+    TransactionTestCase: в TestCase не выполняются on_commit-хуки
+    (автодополнение, кэш), и бюджеты записи были бы занижены.
+    """
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            username="admin", email="admin@mail.ru", role="admin"
+        )
+        self.author = User.objects.create_user(
+            username="author", email="author@mail.ru", role="user"
+        )
+        self.category = Category.objects.create(name="Фильм", slug="films")
+        genres = [
+            Genre.objects.create(name="Ужасы", slug="horror"),
+            Genre.objects.create(name="Драма", slug="drama"),
+        ]
+        self.titles = []
+        for number in range(3):
+            title = Title.objects.create(
+                name=f"Произведение {number}",
+                year=2000,
+                category=self.category,
+            )
+            title.genre.set(genres)
+            self.titles.append(title)
+        self.review = Review.objects.create(
+            title=self.titles[0], author=self.author, text="Отзыв", score=7
+        )
+        self.comment = Comment.objects.create(
+            review=self.review, author=self.author, text="Комментарий"
+        )
+        self.guest_client = APIClient()
+        self.admin_client = self.get_client(self.admin)
+        self.author_client = self.get_client(self.author)
+
+    @staticmethod
+    def get_client(user):
+        token = CustomTokenObtainView().get_tokens_for_user(user)["token"]
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def request(self, client, method, url, data=None, status=None):
+        """
+        Запрос с холодными кэшами процесса: бюджет - худший обычный путь.
+
+        Снимок пользователя, список отзывов токенов (раз в
+        USER_CACHE_TIMEOUT) и кэш ответов читаются из БД заново.
+        """
+        cache.clear()
+        user_snapshots.clear()
+        revocations.clear()
+        response = getattr(client, method)(url, data, format="json")
+        if status is not None:
+            self.assertEqual(response.status_code, status, url)
+        timings = response.wsgi_request.timings
+        self.assertIsNotNone(
+            timings.budget, f"{timings.view}: нет бюджета в query_budgets"
+        )
+        self.assertLessEqual(
+            timings.queries,
+            timings.budget,
+            f"{timings.view}: {timings.queries} > {timings.budget}",
+        )
+        self.assertIn("Server-Timing", response)
+        return response
+
+    def test_catalog_budgets(self):
+        title = self.titles[0]
+        for client in (self.guest_client, self.admin_client):
+            self.request(client, "get", "/api/v1/titles/", status=200)
+            self.request(
+                client, "get", f"/api/v1/titles/{title.id}/", status=200
+            )
+            self.request(client, "get", "/api/v1/categories/", status=200)
+            self.request(client, "get", "/api/v1/genres/", status=200)
+        self.request(
+            self.guest_client,
+            "get",
+            "/api/v1/titles/autocomplete/",
+            {"q": "про"},
+            status=200,
+        )
+        response = self.request(
+            self.admin_client,
+            "post",
+            "/api/v1/titles/",
+            {
+                "name": "Новое",
+                "year": 2001,
+                "category": "films",
+                "genre": ["horror", "drama"],
+            },
+            status=201,
+        )
+        url = f"/api/v1/titles/{response.json()['id']}/"
+        self.request(
+            self.admin_client, "patch", url, {"name": "Другое"}, status=200
+        )
+        self.request(self.admin_client, "delete", url, status=204)
+        for path in ("categories", "genres"):
+            self.request(
+                self.admin_client,
+                "post",
+                f"/api/v1/{path}/",
+                {"name": "Новая", "slug": "new"},
+                status=201,
+            )
+            self.request(
+                self.admin_client,
+                "delete",
+                f"/api/v1/{path}/new/",
+                status=204,
+            )
+
+    def test_review_and_comment_budgets(self):
+        title = self.titles[0]
+        reviews = f"/api/v1/titles/{title.id}/reviews/"
+        comments = f"{reviews}{self.review.id}/comments/"
+        for client in (self.guest_client, self.author_client):
+            for url in (
+                reviews,
+                f"{reviews}{self.review.id}/",
+                comments,
+                f"{comments}{self.comment.id}/",
+            ):
+                self.request(client, "get", url, status=200)
+        response = self.request(
+            self.admin_client,
+            "post",
+            reviews,
+            {"text": "Отзыв", "score": 5},
+            status=201,
+        )
+        url = f"{reviews}{response.json()['id']}/"
+        self.request(self.admin_client, "patch", url, {"score": 6}, status=200)
+        self.request(
+            self.admin_client,
+            "patch",
+            f"{reviews}{self.review.id}/",
+            {"text": "Правка модератора"},
+            status=200,
+        )
+        self.request(self.admin_client, "delete", url, status=204)
+        response = self.request(
+            self.author_client,
+            "post",
+            comments,
+            {"text": "Еще"},
+            status=201,
+        )
+        url = f"{comments}{response.json()['id']}/"
+        self.request(
+            self.author_client, "patch", url, {"text": "Да"}, status=200
+        )
+        self.request(self.author_client, "delete", url, status=204)
+
+    def test_user_and_auth_budgets(self):
+        self.request(self.admin_client, "get", "/api/v1/users/", status=200)
+        self.request(
+            self.admin_client, "get", "/api/v1/users/author/", status=200
+        )
+        self.request(
+            self.admin_client,
+            "post",
+            "/api/v1/users/",
+            {"username": "new", "email": "new@mail.ru"},
+            status=201,
+        )
+        self.request(
+            self.admin_client,
+            "patch",
+            "/api/v1/users/new/",
+            {"bio": "Био"},
+            status=200,
+        )
+        self.request(
+            self.admin_client, "delete", "/api/v1/users/new/", status=204
+        )
+        self.request(
+            self.author_client, "get", "/api/v1/users/me/", status=200
+        )
+        self.request(
+            self.author_client,
+            "patch",
+            "/api/v1/users/me/",
+            {"bio": "Био"},
+            status=200,
+        )
+        for username in ("author", "newcomer"):
+            self.request(
+                self.guest_client,
+                "post",
+                "/api/v1/auth/signup/",
+                {"username": username, "email": f"{username}@mail.ru"},
+                status=200,
+            )
+        self.assertTrue(User.objects.filter(username="newcomer").exists())
+        self.request(
+            self.guest_client,
+            "post",
+            "/api/v1/auth/token/",
+            {
+                "username": "author",
+                "confirmation_code": PasswordResetTokenGenerator().make_token(
+                    self.author
+                ),
+            },
+            status=200,
+        )
+
+    def test_every_viewset_declares_budgets(self):
+        for _, viewset, _ in router.registry:
+            self.assertTrue(viewset.query_budgets, viewset.__name__)
+
+    def test_server_timing_and_log_record(self):
+        """Счетчики уходят в Server-Timing и JSON-запись api.requests."""
+        with self.assertLogs("api.requests", "INFO") as logs:
+            response = self.request(
+                self.guest_client, "get", "/api/v1/titles/", status=200
+            )
+        timings = response.wsgi_request.timings
+        self.assertTrue(
+            response["Server-Timing"].startswith(
+                f"db;dur={timings.db_time * 1000:.2f};"
+                f'desc="{timings.queries} SQL"'
+            )
+        )
+        for metric in ("serialize;dur=", "render;dur=", "total;dur="):
+            self.assertIn(metric, response["Server-Timing"])
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "TitleViewSet.list")
+        self.assertEqual(record["queries"], timings.queries)
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["serialize_ms"], 0)
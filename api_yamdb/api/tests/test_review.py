@@ -1,8 +1,15 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection
 from django.shortcuts import get_object_or_404
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from api.serializers import ReviewsSerializer
 from reviews.models import Review
 from titles.models import Category, Genre, Title
 from users.models import User
@@ -15,6 +22,20 @@ TEST_GENRE_FIELDS: dict = {"name": "Ужасы", "slug": "horror"}
 
 TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
 
+# SELECT произведения, SAVEPOINT, INSERT отзыва, UPDATE счетчиков, RELEASE.
+REVIEW_CREATE_QUERIES = 5
+
+# Валидаторы страницы, страница отзывов с авторами.
+REVIEW_LIST_QUERIES = 2
+
+
+def title_updates(context):
+    return [
+        query["sql"]
+        for query in context.captured_queries
+        if query["sql"].startswith('UPDATE "titles_title"')
+    ]
+
 
 class ReviewViewsTest(TestCase):
     @classmethod
@@ -69,3 +90,187 @@ class ReviewViewsTest(TestCase):
             f"/api/v1/titles/{self.title.id}/reviews/{self.review.id}/"
         )
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_rating_follows_review_update_and_delete(self):
+        """Счетчики оценок сдвигаются при изменении и удалении отзыва."""
+        response = self.admin_client.patch(
+            f"/api/v1/titles/{self.title.id}/reviews/{self.review.id}/",
+            data={"score": 9},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count), (9, 1)
+        )
+        self.assertEqual(self.title.rating, 9)
+        response = self.admin_client.delete(
+            f"/api/v1/titles/{self.title.id}/reviews/{self.review.id}/"
+        )
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count), (0, 0)
+        )
+        self.assertIsNone(self.title.rating)
+
+    def test_rating_follows_cascade_delete(self):
+        """Удаление автора убирает его оценки из рейтинга."""
+        Review.objects.create(
+            title=self.title, text="Отзыв №2", score=8, author=self.user
+        )
+        self.user.delete()
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count), (5, 1)
+        )
+
+    def test_cascade_updates_each_title_once(self):
+        """Каскад снимает оценки одним UPDATE на произведение."""
+        authors = [
+            User.objects.create_user(username=f"reader{number}")
+            for number in range(3)
+        ]
+        for number, author in enumerate(authors, 1):
+            Review.objects.create(
+                title=self.title, text="Отзыв", score=number, author=author
+            )
+        with CaptureQueriesContext(connection) as context:
+            User.objects.filter(pk__in=[a.pk for a in authors]).delete()
+        self.assertEqual(len(title_updates(context)), 1)
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count, self.title.rating),
+            (5, 1, 5),
+        )
+
+    def test_deleted_title_counters_not_updated(self):
+        title = Title.objects.create(name="Другое", year=2000)
+        for number in range(3):
+            Review.objects.create(
+                title=title,
+                text="Отзыв",
+                score=5,
+                author=User.objects.create_user(username=f"reader{number}"),
+            )
+        with CaptureQueriesContext(connection) as context:
+            title.delete()
+        self.assertEqual(title_updates(context), [])
+
+    def test_rebuild_ratings_command(self):
+        """Команда rebuild_ratings восстанавливает счетчики с нуля."""
+        Title.objects.update(score_sum=0, review_count=0, rating=None)
+        call_command("rebuild_ratings", stdout=StringIO())
+        self.title.refresh_from_db()
+        self.assertEqual(
+            (self.title.score_sum, self.title.review_count), (5, 1)
+        )
+        self.assertEqual(self.title.rating, 5)
+
+    def test_create_review_query_budget(self):
+        """Создание отзыва укладывается в фиксированное число запросов."""
+        with self.assertNumQueries(REVIEW_CREATE_QUERIES):
+            response = self.authorized_client.post(
+                f"/api/v1/titles/{self.title.id}/reviews/",
+                data={"text": "Отзыв №2", "score": 3},
+            )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+    def test_second_review_rejected_by_constraint(self):
+        """Повторный отзыв отклоняется с 400 и не меняет рейтинг."""
+        response = self.admin_client.post(
+            f"/api/v1/titles/{self.title.id}/reviews/",
+            data={"text": "Отзыв №2", "score": 1},
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.json(),
+            {
+                "non_field_errors": [
+                    "Нельзя добавить второй отзыв на произведение"
+                ]
+            },
+        )
+        self.title.refresh_from_db()
+        self.assertEqual(self.title.rating, 5)
+
+    def test_moderator_update_keeps_author(self):
+        """Правка чужого отзыва не переписывает автора на модератора."""
+        review = Review.objects.create(
+            title=self.title, text="Отзыв №2", score=8, author=self.user
+        )
+        response = self.admin_client.patch(
+            f"/api/v1/titles/{self.title.id}/reviews/{review.id}/",
+            data={"text": "Исправлено"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["author"], self.user.username)
+        review.refresh_from_db()
+        self.assertEqual(review.author, self.user)
+        self.assertEqual(review.text, "Исправлено")
+
+    def test_other_integrity_errors_not_masked(self):
+        """Только unique_review превращается в 400."""
+        error = IntegrityError(
+            "NOT NULL constraint failed: reviews_review.text"
+        )
+        with mock.patch.object(ReviewsSerializer, "save", side_effect=error):
+            with self.assertRaises(IntegrityError):
+                self.authorized_client.post(
+                    f"/api/v1/titles/{self.title.id}/reviews/",
+                    data={"text": "Отзыв №2", "score": 3},
+                )
+
+    def test_reviews_cursor_pagination(self):
+        """Keyset-страницы без count проходят все отзывы по порядку."""
+        for number in range(4):
+            author = User.objects.create_user(username=f"reader_{number}")
+            Review.objects.create(
+                title=self.title,
+                text=f"Отзыв {number}",
+                score=7,
+                author=author,
+            )
+        url = f"/api/v1/titles/{self.title.id}/reviews/?cursor=&limit=2"
+        seen = []
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.json())
+            seen.extend(item["id"] for item in response.json()["results"])
+            url = response.json()["next"]
+        expected = list(
+            Review.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+        previous = self.client.get(response.json()["previous"])
+        self.assertEqual(
+            [item["id"] for item in previous.json()["results"]],
+            expected[2:4],
+        )
+        response = self.client.get(
+            f"/api/v1/titles/{self.title.id}/reviews/?cursor=broken"
+        )
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_reviews_list_query_count_does_not_grow(self):
+        """Авторы загружаются вместе со страницей, без запроса на отзыв."""
+        User.objects.bulk_create(
+            User(username=f"author_{number}") for number in range(1000)
+        )
+        authors = User.objects.filter(username__startswith="author_")
+        Review.objects.bulk_create(
+            Review(title=self.title, text="Отзыв", score=7, author=author)
+            for author in authors
+        )
+        for limit in (10, 100, 1000):
+            with self.assertNumQueries(REVIEW_LIST_QUERIES):
+                response = self.client.get(
+                    f"/api/v1/titles/{self.title.id}/reviews/",
+                    {"limit": limit},
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = response.json()["results"]
+            self.assertEqual(len(results), limit)
+            self.assertTrue(results[-1]["author"].startswith("author_"))
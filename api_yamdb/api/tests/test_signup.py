@@ -7,6 +7,8 @@ from django.test import TestCase
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from users.models import OutgoingEmail
+
 User = get_user_model()
 
 
@@ -129,6 +131,60 @@ class SignUpViewsTest(TestCase):
             {"username": ["A user with that username already exists."]},
         )
 
+    def test_signup_existing_user_resends_code(self):
+        """Повторная регистрация: SELECT, запись в очередь и письмо."""
+        url = "/api/v1/auth/signup/"
+        user = User.objects.create(
+            email="test@mail.ru", username="testusername"
+        )
+        data = {"email": "TEST@mail.ru", "username": "testusername"}
+        with self.assertNumQueries(2):
+            response = self.guest_client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(User.objects.filter(email="test@mail.ru").count(), 1)
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, [user.email])
+        self.assertTrue(
+            PasswordResetTokenGenerator().check_token(
+                user, mail.outbox[0].body
+            )
+        )
+        self.assertIsNotNone(OutgoingEmail.objects.get().sent_at)
+
+    def test_signup_uniqueness_ignores_case(self):
+        """Email и username уникальны без учета регистра."""
+        url = "/api/v1/auth/signup/"
+        User.objects.create(email="test@mail.ru", username="TestUserName")
+        data = {"email": "TEST@Mail.ru", "username": "other"}
+        response = self.guest_client.post(url, data)
+        self.assertEqual(
+            response.json(), {"email": ["Email должен быть уникальным"]}
+        )
+        data = {"email": "other@mail.ru", "username": "testusername"}
+        response = self.guest_client.post(url, data)
+        self.assertEqual(
+            response.json(),
+            {"username": ["A user with that username already exists."]},
+        )
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_normalized_fields(self):
+        """Тени заполняются при save() и bulk_create(), пустой email - NULL."""
+        User.objects.bulk_create(
+            [
+                User(username="First", email=""),
+                User(username="Second", email=" Second@Mail.ru"),
+            ]
+        )
+        self.assertEqual(
+            dict(
+                User.objects.filter(
+                    username__in=("First", "Second")
+                ).values_list("username_normalized", "email_normalized")
+            ),
+            {"first": None, "second": "second@mail.ru"},
+        )
+
     def test_signup_create_user_username_not_me(self):
         """Использовать имя 'me' в качестве username запрещено."""
         url = "/api/v1/auth/signup/"
@@ -0,0 +1,157 @@
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from titles.models import Category, Genre, Title
+
+TEST_GENRE_FIELDS: dict = {"name": "Ужасы", "slug": "horror"}
+
+TEST_CATEGORY_FIELDS: dict = {"name": "Фильм", "slug": "films"}
+
+TITLES_LIST_QUERIES = 3
+
+
+class TitleViewsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.genre = Genre.objects.create(**TEST_GENRE_FIELDS)
+        cls.second_genre = Genre.objects.create(name="Драма", slug="drama")
+        cls.category = Category.objects.create(**TEST_CATEGORY_FIELDS)
+        cls.guest_client = APIClient()
+
+    def create_titles(self, count):
+        Title.objects.bulk_create(
+            Title(
+                name=f"Произведение {number}",
+                year=2000,
+                category=self.category,
+            )
+            for number in range(count)
+        )
+        for title in Title.objects.all():
+            title.genre.set([self.genre, self.second_genre])
+
+    def test_titles_list_query_count_does_not_grow(self):
+        """Число запросов списка не зависит от размера страницы."""
+        for count in (1, 50):
+            Title.objects.all().delete()
+            self.create_titles(count)
+            with self.assertNumQueries(TITLES_LIST_QUERIES):
+                response = self.guest_client.get(
+                    "/api/v1/titles/", {"limit": 100}
+                )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(len(response.json()["results"]), count)
+
+    def test_titles_detail_query_count(self):
+        """Детальная страница: валидаторы, произведение с категорией, жанры."""
+        self.create_titles(1)
+        title = Title.objects.get()
+        with self.assertNumQueries(3):
+            response = self.guest_client.get(f"/api/v1/titles/{title.id}/")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json()["category"], TEST_CATEGORY_FIELDS)
+        self.assertEqual(len(response.json()["genre"]), 2)
+
+    def walk_cursor_pages(self, ordering):
+        url = f"/api/v1/titles/?cursor=&limit=2&ordering={ordering}"
+        seen = []
+        while url:
+            response = self.guest_client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn("count", response.json())
+            seen.extend(item["id"] for item in response.json()["results"])
+            url = response.json()["next"]
+        return seen
+
+    def test_titles_cursor_pagination_by_rating(self):
+        """Keyset-страницы по рейтингу проходят и произведения без оценок."""
+        self.create_titles(5)
+        titles = list(Title.objects.order_by("id"))
+        for title, rating in zip(titles, (7, None, 7, 3, None)):
+            Title.objects.filter(pk=title.pk).update(rating=rating)
+        expected = [
+            titles[2].id,
+            titles[0].id,
+            titles[3].id,
+            titles[4].id,
+            titles[1].id,
+        ]
+        self.assertEqual(self.walk_cursor_pages("-rating"), expected)
+        self.assertEqual(
+            self.walk_cursor_pages("rating"), list(reversed(expected))
+        )
+
+    def test_titles_ordering_whitelist(self):
+        """Сортировка только по разрешенным полям, иначе по id."""
+        self.create_titles(3)
+        ids = list(Title.objects.values_list("id", flat=True))
+        response = self.guest_client.get("/api/v1/titles/?ordering=-id")
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]],
+            list(reversed(ids)),
+        )
+        response = self.guest_client.get(
+            "/api/v1/titles/?ordering=description"
+        )
+        self.assertEqual(
+            [item["id"] for item in response.json()["results"]], ids
+        )
+
+    def search(self, **params):
+        response = self.guest_client.get("/api/v1/titles/", params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [item["name"] for item in response.json()["results"]]
+
+    def test_titles_search_ranked_and_filtered(self):
+        """Поиск по name и description, релевантные первыми, с фильтрами."""
+        other = Category.objects.create(name="Книга", slug="books")
+        Title.objects.create(
+            name="Сказка",
+            year=1990,
+            category=self.category,
+            description="Про дракона",
+        )
+        Title.objects.create(
+            name="Драконы драконов",
+            year=2000,
+            category=self.category,
+            description="Снова драконы и драконы",
+        )
+        Title.objects.create(
+            name="Дракон", year=2000, category=other, description=""
+        )
+        Title.objects.create(name="Море", year=2000, category=self.category)
+        self.assertEqual(self.search(search="дракон")[0], "Драконы драконов")
+        self.assertEqual(
+            set(self.search(search="ДРАКОН")),
+            {"Сказка", "Драконы драконов", "Дракон"},
+        )
+        self.assertEqual(
+            self.search(search="дракон", category="films", year=2000),
+            ["Драконы драконов"],
+        )
+        self.assertEqual(
+            self.search(search="дракон", ordering="-id"),
+            ["Дракон", "Драконы драконов", "Сказка"],
+        )
+        self.assertEqual(self.search(search='"AND (*'), [])
+
+    def test_titles_search_index_follows_changes(self):
+        """Индекс поиска обновляется при изменении и удалении."""
+        title = Title.objects.create(name="Старое", year=2000)
+        self.assertEqual(self.search(search="старое"), ["Старое"])
+        title.name = "Новое"
+        title.save()
+        self.assertEqual(self.search(search="старое"), [])
+        self.assertEqual(self.search(search="нов"), ["Новое"])
+        title.delete()
+        self.assertEqual(self.search(search="новое"), [])
+
+    def test_titles_search_ignores_cursor(self):
+        """Порядок по релевантности отдается limit/offset-страницей."""
+        title = Title.objects.create(name="Курсор", year=2000)
+        response = self.guest_client.get(
+            "/api/v1/titles/", {"search": "курсор", "cursor": ""}
+        )
+        self.assertEqual(response.json()["results"][0]["id"], title.id)
@@ -2,8 +2,10 @@ import unittest
 
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
 from django.core import mail
+from django.db import connection
 from django.shortcuts import get_object_or_404
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 from rest_framework.test import APIClient
 
@@ -114,3 +116,34 @@ class TokenViewsTest(TestCase):
         }
         response = self.guest_client.post(url, data)
         self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_auth_token_loads_user_once(self):
+        """Выдача токена читает пользователя одним запросом."""
+        user = User.objects.create_user(username="testusername")
+        data = {
+            "username": "testusername",
+            "confirmation_code": PasswordResetTokenGenerator().make_token(
+                user
+            ),
+        }
+        with CaptureQueriesContext(connection) as context:
+            response = self.guest_client.post("/api/v1/auth/token/", data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user_queries = [
+            query
+            for query in context.captured_queries
+            if '"users_user"' in query["sql"]
+        ]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_auth_token_mixed_case_username(self):
+        """Username в другом регистре находится по нормализованной тени."""
+        user = User.objects.create_user(username="TestUserName")
+        data = {
+            "username": "testusername",
+            "confirmation_code": PasswordResetTokenGenerator().make_token(
+                user
+            ),
+        }
+        response = self.guest_client.post("/api/v1/auth/token/", data)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
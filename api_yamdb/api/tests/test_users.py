@@ -97,6 +97,20 @@ class UsersViewsTest(TestCase):
             },
         )
 
+    def test_get_users_detail_ignores_case(self):
+        """username в URL ищется без учета регистра."""
+        user = User.objects.create_user(username="Author")
+        for username in ("author", "AUTHOR"):
+            response = self.admin_client.get(f"/api/v1/users/{username}/")
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.json()["username"], user.username)
+        response = self.admin_client.patch(
+            "/api/v1/users/author/", {"bio": "Био"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertEqual(user.bio, "Био")
+
     def test_create_user(self):
         """Добавление пользователя.
         Права доступа: Администратор."""
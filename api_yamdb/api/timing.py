@@ -0,0 +1,130 @@
+import json
+import logging
+from contextlib import ExitStack, contextmanager
+from time import perf_counter
+
+from django.db import connections
+
+from .metrics import LATENCY, QUERIES, REQUESTS
+
+logger = logging.getLogger("api.requests")
+
+
+class RequestTimings:
+    """Счетчики одного запроса: SQL, сериализация, рендеринг."""
+
+    def __init__(self):
+        self.started = perf_counter()
+        self.view = None
+        self.route = "unmatched"
+        self.budget = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serialize_time = 0.0
+        self.render_time = 0.0
+        self.total_time = None
+
+    def __call__(self, execute, sql, params, many, context):
+        """execute_wrapper: считает запросы и их время."""
+        started = perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += perf_counter() - started
+            self.queries += 1
+
+    @contextmanager
+    def serializing(self):
+        started = perf_counter()
+        try:
+            yield
+        finally:
+            self.serialize_time += perf_counter() - started
+
+    def rendered(self, started):
+        """post_render_callback: рендеринг идет сразу после view."""
+        self.render_time += perf_counter() - started
+
+    @property
+    def over_budget(self):
+        return self.budget is not None and self.queries > self.budget
+
+    def finish(self, status):
+        self.total_time = perf_counter() - self.started
+        REQUESTS.inc(self.route, status)
+        LATENCY.observe(self.total_time, self.route, status)
+        QUERIES.inc(self.route, amount=self.queries)
+
+    def server_timing(self):
+        """Значение заголовка Server-Timing, длительности в мс."""
+        return ", ".join(
+            (
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} SQL"',
+                f"serialize;dur={self.serialize_time * 1000:.2f}",
+                f"render;dur={self.render_time * 1000:.2f}",
+                f"total;dur={self.total_time * 1000:.2f}",
+            )
+        )
+
+    def as_dict(self):
+        return {
+            "view": self.view,
+            "queries": self.queries,
+            "query_budget": self.budget,
+            "db_ms": round(self.db_time * 1000, 2),
+            "serialize_ms": round(self.serialize_time * 1000, 2),
+            "render_ms": round(self.render_time * 1000, 2),
+            "total_ms": round(self.total_time * 1000, 2),
+        }
+
+
+class QueryTimingMiddleware:
+    """
+    Число и время SQL-запросов, время сериализации и рендеринга.
+
+    Запросы ко всем базам считаются через execute_wrapper, без DEBUG.
+    Итог уходит в заголовок Server-Timing и одной JSON-строкой в логгер
+    api.requests; превышение query_budgets view пишется как WARNING.
+    Сериализацию и рендеринг отмечает TimingMixin у DRF-view. Время и
+    статус каждого запроса попадают в метрики api.metrics по маршруту:
+    basename.action для ViewSet, Класс.метод для APIView.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = request.timings = RequestTimings()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(timings))
+            response = self.get_response(request)
+        timings.finish(response.status_code)
+        response["Server-Timing"] = timings.server_timing()
+        record = {
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code,
+            **timings.as_dict(),
+        }
+        level = logging.WARNING if timings.over_budget else logging.INFO
+        logger.log(level, json.dumps(record), extra={"timings": record})
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        """Имя DRF-view для журнала и бюджета: TitleViewSet.list."""
+        view_class = getattr(view_func, "cls", None)
+        if view_class is None:
+            request.timings.route = request.resolver_match.view_name
+            return None
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        request.timings.view = f"{view_class.__name__}.{action}"
+        basename = view_func.initkwargs.get("basename")
+        request.timings.route = (
+            f"{basename}.{action}" if basename else request.timings.view
+        )
+        request.timings.budget = getattr(view_class, "query_budgets", {}).get(
+            action
+        )
+        return None
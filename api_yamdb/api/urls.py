@@ -2,8 +2,8 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .views import (CategoryViewSet, CommentViewSet, CustomTokenObtainView,
-                    GenreViewSet, ReviewViewSet, SignUpAPIView, TitleViewSet,
-                    UserViewSet)
+                    ExportAPIView, GenreViewSet, ReviewViewSet, SignUpAPIView,
+                    TitleAutocompleteView, TitleViewSet, UserViewSet)
 
 app_name = "api"
 
@@ -23,6 +23,12 @@ router.register(
 router.register("users", UserViewSet, basename="users")
 
 urlpatterns = [
+    # Раньше роутера: иначе autocomplete попадет в titles/<pk>/.
+    path(
+        "v1/titles/autocomplete/",
+        TitleAutocompleteView.as_view(),
+        name="titles-autocomplete",
+    ),
     path("v1/", include(router.urls)),
     path("v1/auth/signup/", SignUpAPIView.as_view()),
     path(
@@ -30,4 +36,9 @@ urlpatterns = [
         CustomTokenObtainView.as_view(),
         name="token_obtain_pair",
     ),
+    path(
+        "v1/export/<slug:dataset>.<slug:export_format>",
+        ExportAPIView.as_view(),
+        name="export",
+    ),
 ]
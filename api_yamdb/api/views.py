@@ -1,24 +1,36 @@
 from django.conf import settings
 from django.contrib.auth.tokens import PasswordResetTokenGenerator
-from django.core.mail import send_mail
-from django.db.models import Avg
+from django.db import IntegrityError
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import (CharFilter, DjangoFilterBackend,
                                            FilterSet, NumberFilter)
-from rest_framework import filters, status, viewsets
+from rest_framework import status, viewsets
+from rest_framework.authentication import SessionAuthentication
 from rest_framework.decorators import action
-from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.permissions import (AllowAny, IsAuthenticated,
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.permissions import (SAFE_METHODS, AllowAny,
+                                        IsAuthenticated,
                                         IsAuthenticatedOrReadOnly)
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
 
-from reviews.models import Review
+from reviews.models import Comment, Review
+from titles.autocomplete import title_index
 from titles.models import Category, Genre, Title
+from users.mail import enqueue_mail
 from users.models import User
 
-from .mixins import CreateListDestroyViewSet
+from .authentication import CachedJWTAuthentication, add_user_claims
+from .datasets import DATASETS, EXPORT_FORMATS, iter_export
+from .filters import NameSearchFilter, StableOrderingFilter
+from .metrics import CONTENT_TYPE, registry
+from .mixins import (AnonymousCacheMixin, ConditionalGetMixin,
+                     CreateListDestroyViewSet, NestedResourceMixin,
+                     TimingMixin)
+from .pagination import CachedCountPagination, KeysetPagination
 from .permissions import IsAdminOrReadOnly, IsAuthorOrStaff, UserPermission
 from .serializers import (CategorySerializer, CommentsSerializer,
                           CustomTokenObtainSerializer, GenreSerializer,
@@ -31,21 +43,48 @@ class TitleFilter(FilterSet):
 
     category = CharFilter(lookup_expr="slug")
     genre = CharFilter(lookup_expr="slug")
-    name = CharFilter(lookup_expr="icontains")
+    name = CharFilter(method="filter_name")
     year = NumberFilter(field_name="year")
+    search = CharFilter(method="filter_search")
 
     class Meta:
         model = Title
-        fields = ("category", "genre", "name", "year")
+        fields = ("category", "genre", "name", "year", "search")
 
+    def filter_name(self, queryset, name, value):
+        return queryset.name_contains(value)
 
-class TitleViewSet(viewsets.ModelViewSet):
+    def filter_search(self, queryset, name, value):
+        return queryset.search(value)
+
+
+class TitleViewSet(
+    TimingMixin,
+    AnonymousCacheMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    cache_models = (Title, Genre, Category, Review)
     permission_classes = [IsAdminOrReadOnly]
     queryset = Title.objects.all()
     serializer_class = TitleSerializer
-    pagination_class = LimitOffsetPagination
-    filter_backends = (DjangoFilterBackend,)
+    pagination_class = KeysetPagination
+    filter_backends = (DjangoFilterBackend, StableOrderingFilter)
     filterset_class = TitleFilter
+    ordering_fields = ("id", "year", "name", "rating")
+    ordering = ("id",)
+    query_budgets = {
+        "list": 4,
+        "retrieve": 4,
+        "create": 15,
+        "partial_update": 10,
+        "destroy": 8,
+    }
+
+    def get_queryset(self):
+        if self.action in ["list", "retrieve"]:
+            return Title.objects.for_read()
+        return super().get_queryset()
 
     def get_serializer_class(self):
         if self.action in ["list", "retrieve"]:
@@ -53,66 +92,100 @@ class TitleViewSet(viewsets.ModelViewSet):
         return TitlePostSerializer
 
 
-class CategoryViewSet(CreateListDestroyViewSet):
+class TitleAutocompleteView(TimingMixin, APIView):
+    """Подсказки по началу названия из памяти процесса, без запросов к БД."""
+
+    authentication_classes = ()
+    permission_classes = [AllowAny]
+    default_limit = 10
+    max_limit = 50
+    query_budgets = {"get": 1}
+
+    def get(self, request):
+        try:
+            limit = int(request.query_params.get("limit", self.default_limit))
+        except ValueError:
+            limit = self.default_limit
+        limit = min(limit, self.max_limit)
+        return Response(
+            title_index.search(request.query_params.get("q", ""), limit)
+        )
+
+
+class CategoryViewSet(
+    TimingMixin, AnonymousCacheMixin, CreateListDestroyViewSet
+):
+    cache_models = (Category,)
     permission_classes = [IsAdminOrReadOnly]
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
     lookup_field = "slug"
-    pagination_class = LimitOffsetPagination
-    filter_backends = (filters.SearchFilter,)
+    pagination_class = CachedCountPagination
+    filter_backends = (NameSearchFilter,)
     search_fields = ("name",)
+    query_budgets = {"list": 3, "create": 7, "destroy": 6}
 
 
-class GenreViewSet(CreateListDestroyViewSet):
+class GenreViewSet(TimingMixin, AnonymousCacheMixin, CreateListDestroyViewSet):
+    cache_models = (Genre,)
     permission_classes = [IsAdminOrReadOnly]
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
     lookup_field = "slug"
-    pagination_class = LimitOffsetPagination
-    filter_backends = (filters.SearchFilter,)
+    pagination_class = CachedCountPagination
+    filter_backends = (NameSearchFilter,)
     search_fields = ("name",)
+    query_budgets = {"list": 3, "create": 7, "destroy": 6}
 
 
-class SignUpAPIView(APIView):
+class SignUpAPIView(TimingMixin, APIView):
     """
     Анонимный пользователь высылает JSON c "email" и "username".
     В ответ на почту получает confirmation_code.
     """
 
     permission_classes = (AllowAny,)
+    query_budgets = {"post": 4}
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
-        if User.objects.filter(
-            email=request.data.get("email"),
-            username=request.data.get("username"),
-        ).exists():
-            user = User.objects.get(username=request.data.get("username"))
-        if serializer.is_valid():
-            user = User.objects.create(
-                **serializer.validated_data, role="user"
-            )
-        else:
-            return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
-        self.send_token(user, request.data.get("email"))
+        serializer.is_valid(raise_exception=True)
+        user = serializer.save()
+        self.send_token(user, user.email)
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def send_token(self, user, email):
-        send_mail(
+        enqueue_mail(
             "Confirmation code for receiving a token",
             PasswordResetTokenGenerator().make_token(user),
             settings.ADMIN_MAIL,
             [email],
-            fail_silently=False,
         )
 
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(TimingMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [UserPermission]
-    pagination_class = LimitOffsetPagination
+    pagination_class = CachedCountPagination
     lookup_field = "username"
+    query_budgets = {
+        "list": 3,
+        "retrieve": 2,
+        "create": 4,
+        "partial_update": 6,
+        "destroy": 11,
+        "get_me": 6,
+    }
+
+    def get_object(self):
+        """username в URL без учета регистра, как при регистрации."""
+        queryset = self.filter_queryset(self.get_queryset())
+        user = get_object_or_404(
+            queryset.by_username(self.kwargs[self.lookup_field])
+        )
+        self.check_object_permissions(self.request, user)
+        return user
 
     @action(
         detail=False,
@@ -122,11 +195,11 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     def get_me(self, request):
         if request.method == "GET":
-            user = User.objects.get(username=request.user.username)
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = self.get_serializer(user)
             return Response(serializer.data, status=status.HTTP_200_OK)
         if request.method == "PATCH":
-            user = get_object_or_404(User, username=request.user.username)
+            user = get_object_or_404(User, pk=request.user.pk)
             serializer = UserMeSerializer(
                 user, data=request.data, partial=True
             )
@@ -136,82 +209,166 @@ class UserViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
 
-class ReviewViewSet(viewsets.ModelViewSet):
-    serializer_class = ReviewsSerializer
-    permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrStaff]
-    pagination_class = LimitOffsetPagination
+def with_authors(queryset, request):
+    """Авторы одним JOIN со страницей при чтении.
 
-    def get_title(self):
-        return get_object_or_404(Title, pk=self.kwargs["title_id"])
+    На запись объект только проверяется по author_id, а автором
+    становится request.user, так что JOIN там не нужен.
+    """
+    if request.method in SAFE_METHODS:
+        return queryset.select_related("author")
+    return queryset
 
-    def rating_update(self, title):
-        title.rating = Review.objects.filter(title=title).aggregate(
-            Avg("score")
-        )["score__avg"]
-        title.save(update_fields=["rating"])
 
-    def get_queryset(self):
-        title = self.get_title()
-        return title.reviews.all()
+def is_unique_review_error(error):
+    """IntegrityError от unique_review, а не от другого ограничения.
 
-    def save_instance(self, serializer):
-        title = self.get_title()
-        serializer.save(author=self.request.user, title_id=title.id)
-        self.rating_update(title)
+    PostgreSQL называет ограничение по имени, SQLite - по столбцам.
+    """
+    table = Review._meta.db_table
+    columns = ", ".join(
+        f"{table}.{Review._meta.get_field(name).column}"
+        for name in ("title", "author")
+    )
+    message = str(error)
+    return "unique_review" in message or columns in message
+
+
+class ReviewViewSet(
+    TimingMixin,
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Review.objects.all()
+    cache_models = (Review, User)
+    serializer_class = ReviewsSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrStaff]
+    pagination_class = KeysetPagination
+    parent_model = Title
+    parent_field = "title"
+    parent_lookups = {"title_id": "id"}
+    query_budgets = {
+        "list": 3,
+        "retrieve": 3,
+        "create": 6,
+        "partial_update": 6,
+        "destroy": 7,
+    }
+
+    def get_queryset(self):
+        return with_authors(super().get_queryset(), self.request)
 
     def perform_create(self, serializer):
-        self.save_instance(serializer)
+        """Дубликат ловит ограничение unique_review, без запроса exists()."""
+        title = self.get_parent()
+        self.save_review(
+            serializer, author=self.request.user, title_id=title.id
+        )
 
     def perform_update(self, serializer):
-        self.save_instance(serializer)
-
-    def perform_destroy(self, instance):
-        instance.delete()
-
-    def destroy(self, request, *args, **kwargs):
-        instance = self.get_object()
-        self.perform_destroy(instance)
-        self.rating_update(self.get_title())
-        return Response(status=status.HTTP_204_NO_CONTENT)
+        # Объект найден выборкой по title_id из URL, родитель уже проверен.
+        # Автор не меняется: модератор может править чужой отзыв. Свой
+        # отзыв показывается с request.user, без запроса автора.
+        review = serializer.instance
+        if review.author_id == self.request.user.pk:
+            review.author = self.request.user
+        self.save_review(serializer)
+
+    @staticmethod
+    def save_review(serializer, **fields):
+        try:
+            serializer.save(**fields)
+        except IntegrityError as error:
+            if not is_unique_review_error(error):
+                raise
+            raise ValidationError(
+                {
+                    api_settings.NON_FIELD_ERRORS_KEY: [
+                        "Нельзя добавить второй отзыв на произведение"
+                    ]
+                }
+            )
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(
+    TimingMixin,
+    NestedResourceMixin,
+    ConditionalGetMixin,
+    viewsets.ModelViewSet,
+):
+    queryset = Comment.objects.all()
+    cache_models = (Comment, User)
     serializer_class = CommentsSerializer
     permission_classes = [IsAuthenticatedOrReadOnly, IsAuthorOrStaff]
-    pagination_class = LimitOffsetPagination
-
-    def get_review(self):
-        return get_object_or_404(
-            Review,
-            id=self.kwargs["review_id"],
-            title__id=self.kwargs["title_id"],
-        )
+    pagination_class = KeysetPagination
+    parent_model = Review
+    parent_field = "review"
+    parent_lookups = {"review_id": "id", "title_id": "title_id"}
+    query_budgets = {
+        "list": 3,
+        "retrieve": 3,
+        "create": 3,
+        "partial_update": 4,
+        "destroy": 4,
+    }
 
     def get_queryset(self):
-        review = self.get_review()
-        return review.comments.all()
+        return with_authors(super().get_queryset(), self.request)
 
     def perform_create(self, serializer):
-        review = self.get_review()
+        review = self.get_parent()
         serializer.save(author=self.request.user, review_id=review.id)
 
 
-class CustomTokenObtainView(APIView):
+class CustomTokenObtainView(TimingMixin, APIView):
     permission_classes = (AllowAny,)
+    query_budgets = {"post": 1}
 
     def post(self, request):
         serializer = CustomTokenObtainSerializer(data=request.data)
         if serializer.is_valid():
-            user = get_object_or_404(
-                User, username=serializer.data.get("username")
-            )
-            return Response(
-                self.get_tokens_for_user(user), status.HTTP_200_OK
-            )
+            user = serializer.validated_data["user"]
+            return Response(self.get_tokens_for_user(user), status.HTTP_200_OK)
         return Response(serializer.errors, status.HTTP_400_BAD_REQUEST)
 
     def get_tokens_for_user(self, user):
-        refresh = RefreshToken.for_user(user)
+        refresh = add_user_claims(RefreshToken.for_user(user), user)
         return {
             "token": str(refresh.access_token),
         }
+
+
+class ExportAPIView(TimingMixin, APIView):
+    """
+    Потоковая выгрузка набора данных администратором:
+    /export/<набор>.csv в раскладке static/data или /export/<набор>.ndjson.
+    """
+
+    permission_classes = (UserPermission,)
+
+    def get(self, request, dataset, export_format):
+        if dataset not in DATASETS or export_format not in EXPORT_FORMATS:
+            raise NotFound()
+        response = StreamingHttpResponse(
+            iter_export(DATASETS[dataset], export_format),
+            content_type=EXPORT_FORMATS[export_format],
+        )
+        response[
+            "Content-Disposition"
+        ] = f'attachment; filename="{dataset}.{export_format}"'
+        return response
+
+
+class MetricsView(TimingMixin, APIView):
+    """Метрики процесса в текстовом формате Prometheus, для админов."""
+
+    authentication_classes = (
+        CachedJWTAuthentication,
+        SessionAuthentication,
+    )
+    permission_classes = (UserPermission,)
+    query_budgets = {"get": 1}
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
@@ -1,8 +1,12 @@
 import os
+import sys
 from datetime import timedelta
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
+# Запуск из manage.py test или pytest (pytest.ini).
+TESTING = sys.argv[1:2] == ["test"] or "pytest" in sys.modules
+
 SECRET_KEY = "p&l%385148kslhtyn^##a1)ilz@4zqj=rq&agdol^##zgl9(vs"
 
 DEBUG = True
@@ -27,6 +31,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым: считает SQL всех остальных слоев, включая сессии и auth.
+    "api.timing.QueryTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -93,6 +99,46 @@ USE_L10N = True
 USE_TZ = True
 
 
+# Ответы и count кэшируются в памяти процесса, а версии таблиц, по
+# которым строятся ключи, лежат в общем для всех процессов кэше
+# VERSIONS_CACHE: иначе запись в другом процессе (import_csv,
+# rebuild_ratings, второй воркер) не сбросит кэш этого процесса.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "versions": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.getenv(
+            "VERSIONS_CACHE_LOCATION",
+            os.path.join(BASE_DIR, "cache", "versions"),
+        ),
+        "TIMEOUT": None,
+        "OPTIONS": {"MAX_ENTRIES": 100000},
+    },
+}
+
+VERSIONS_CACHE = "versions"
+
+# Кэш ответов на анонимные GET-запросы каталога, секунды.
+RESPONSE_CACHE_TIMEOUT = 600
+
+# Кэш count для пагинации, секунды.
+COUNT_CACHE_TIMEOUT = 300
+
+# Для таблиц больше этого числа строк count без фильтров берется
+# из статистики СУБД. None отключает оценку.
+COUNT_ESTIMATE_THRESHOLD = None
+
+# Полная перестройка индекса автодополнения в каждом процессе, секунды.
+AUTOCOMPLETE_REFRESH_INTERVAL = 300
+
+# Снимки пользователей для JWT-аутентификации: число в процессе и TTL,
+# секунды.
+USER_CACHE_SIZE = 1024
+USER_CACHE_TIMEOUT = 60
+
+
 STATIC_URL = "/static/"
 
 STATICFILES_DIRS = (os.path.join(BASE_DIR, "static/"),)
@@ -102,7 +148,7 @@ REST_FRAMEWORK = {
         "rest_framework.permissions.IsAuthenticated",
     ],
     "DEFAULT_AUTHENTICATION_CLASSES": [
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "api.authentication.CachedJWTAuthentication",
     ],
     "DEFAULT_PAGINATION_CLASS": [
         "rest_framework.pagination.PageNumberPagination"
@@ -118,5 +164,41 @@ SIMPLE_JWT = {
 
 AUTH_USER_MODEL = "users.User"
 
-EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
+EMAIL_BACKEND = "users.maillog.MailLogBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
+
+# Журнал писем MailLogBackend: размер файла до ротации, число старых
+# файлов и минимальный интервал между fsync, секунды.
+EMAIL_LOG_MAX_BYTES = 10 * 1024 * 1024
+EMAIL_LOG_BACKUPS = 5
+EMAIL_LOG_FSYNC_INTERVAL = 1.0
+
+# Письма пишутся в очередь OutgoingEmail и уходят только через
+# manage.py run_mail_worker, воркер должен быть запущен. В тестах письмо
+# еще и отправляется сразу в запросе, запись в очереди остается.
+EMAIL_OUTBOX_EAGER = TESTING
+
+# Журнал api.requests: INFO - JSON-строка на каждый запрос, WARNING -
+# только превышения query_budgets. Под тестами по умолчанию WARNING.
+REQUEST_LOG_LEVEL = os.getenv(
+    "REQUEST_LOG_LEVEL", "WARNING" if TESTING else "INFO"
+)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {
+        "requests": {
+            "class": "logging.StreamHandler",
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "api.requests": {
+            "handlers": ["requests"],
+            "level": REQUEST_LOG_LEVEL,
+            "propagate": False,
+        },
+    },
+}
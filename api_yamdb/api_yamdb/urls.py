@@ -2,9 +2,12 @@ from django.contrib import admin
 from django.urls import include, path
 from django.views.generic import TemplateView
 
+from api.views import MetricsView
+
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", include("api.urls")),
+    path("metrics", MetricsView.as_view(), name="metrics"),
     path(
         "redoc/",
         TemplateView.as_view(template_name="redoc.html"),
@@ -0,0 +1,30 @@
+"""Общие части нагрузочных прогонов: база SQLite и словарь названий."""
+import os
+
+import django
+
+SYLLABLES = (
+    "ба ве ги до жу зе ка ли мо ну пе ро са ти фу ха це ча ша ю я "
+    "ra ko mi te lu"
+).split()
+
+
+def setup(path, **overrides):
+    """Django на базе path с миграциями; overrides меняют настройки."""
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "api_yamdb.settings")
+    from django.conf import settings
+
+    settings.DATABASES["default"]["NAME"] = path
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    django.setup()
+    from django.core.management import call_command
+
+    call_command("migrate", verbosity=0)
+
+
+def make_words(count, rng):
+    words = set()
+    while len(words) < count:
+        words.add("".join(rng.choices(SYLLABLES, k=rng.randint(2, 4))))
+    return sorted(words)
@@ -0,0 +1,539 @@
+"""
+Задержка, число SQL-запросов и память на всех маршрутах api/urls.py.
+
+Синтетические данные (пользователи, категории, жанры, произведения
+с жанрами, отзывы и комментарии) генерируются с фиксированным seed
+во временной базе SQLite, рабочая база не трогается. С --database
+база сохраняется и при следующем запуске используется повторно.
+Запросы идут через тестовый клиент Django с JWT, то есть мимо кэша
+анонимных ответов. Результат пишется в JSON, с --baseline сравнивается
+с сохраненным прогоном. Запуск из каталога api_yamdb:
+
+    python -m benchmarks.endpoints --scale 1k --output bench.json
+    python -m benchmarks.endpoints --scale 100k --baseline bench.json
+"""
+import argparse
+import json
+import logging
+import math
+import os
+import platform
+import random
+import resource
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+import django
+
+from . import common
+from .common import make_words
+
+SCALES = {"1k": 1_000, "100k": 100_000, "10m": 10_000_000}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scale", choices=SCALES, default="1k")
+    parser.add_argument(
+        "--reviews", type=int, help="Число отзывов, вместо --scale"
+    )
+    parser.add_argument("--reviews-per-title", type=int, default=20)
+    parser.add_argument("--comments-per-review", type=float, default=0.5)
+    parser.add_argument("--categories", type=int, default=20)
+    parser.add_argument("--genres", type=int, default=50)
+    parser.add_argument("--requests", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=13)
+    parser.add_argument(
+        "--database", help="Файл SQLite для повторных прогонов"
+    )
+    parser.add_argument("--output", default="benchmark-results.json")
+    parser.add_argument("--baseline", help="JSON прошлого прогона")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=0.2,
+        help="Допустимый рост p95 относительно базы, доля",
+    )
+    parser.add_argument(
+        "--min-delta-ms",
+        type=float,
+        default=1.0,
+        help="Рост p95 меньше этого значения не считается регрессией",
+    )
+    args = parser.parse_args(argv)
+    if args.reviews is None:
+        args.reviews = SCALES[args.scale]
+    return args
+
+
+def setup(path):
+    common.setup(
+        path,
+        # Без DEBUG: иначе каждый SQL копится в connection.queries.
+        DEBUG=False,
+        ALLOWED_HOSTS=["testserver"],
+        EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+    )
+    # Одна JSON-строка на запрос только мешает; превышения бюджетов
+    # (WARNING) остаются видны.
+    logging.getLogger("api.requests").setLevel(logging.WARNING)
+
+
+def peak_rss_kb():
+    """Пиковый RSS процесса; ru_maxrss в байтах на macOS, в КБ на Linux."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def percentile(values, share):
+    """Ближайший ранг: значение, не меньше которого share выборки."""
+    ordered = sorted(values)
+    index = max(math.ceil(share * len(ordered)) - 1, 0)
+    return ordered[index]
+
+
+def get_sizes(args):
+    titles = max(math.ceil(args.reviews / args.reviews_per_title), 1)
+    users = max(args.reviews_per_title * 5, args.reviews // 10)
+    return {"titles": titles, "users": users}
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def generate(args, rng):
+    """Заполняет базу; id задаются явно, чтобы не перечитывать их."""
+    from django.db import transaction
+
+    from reviews.models import Comment, Review
+    from titles.models import Category, Genre, NameTrigram, Title
+    from users.models import User
+
+    sizes = get_sizes(args)
+    words = make_words(max(args.genres * 4, 2000), rng)
+
+    def save(model, objects, index=False):
+        for chunk in chunked(objects, args.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+                if index:
+                    NameTrigram.objects.index(chunk)
+
+    save(
+        Category,
+        (
+            Category(id=number, name=f"Категория {word}", slug=f"c{number}")
+            for number, word in enumerate(
+                rng.sample(words, args.categories), 1
+            )
+        ),
+        index=True,
+    )
+    save(
+        Genre,
+        (
+            Genre(id=number, name=f"Жанр {word}", slug=f"g{number}")
+            for number, word in enumerate(rng.sample(words, args.genres), 1)
+        ),
+        index=True,
+    )
+    save(
+        User,
+        (
+            User(
+                id=number,
+                username=f"user{number}",
+                email=f"user{number}@example.com",
+                role="user",
+            )
+            for number in range(1, sizes["users"] + 1)
+        ),
+    )
+    save(
+        Title,
+        (
+            Title(
+                id=number,
+                name=" ".join(rng.choices(words, k=3)).capitalize(),
+                year=rng.randint(1900, 2020),
+                description=" ".join(rng.choices(words, k=20)),
+                category_id=rng.randint(1, args.categories),
+            )
+            for number in range(1, sizes["titles"] + 1)
+        ),
+        index=True,
+    )
+    through = Title.genre.through
+    save(
+        through,
+        (
+            through(title_id=title, genre_id=genre)
+            for title in range(1, sizes["titles"] + 1)
+            for genre in rng.sample(
+                range(1, args.genres + 1), rng.randint(1, 3)
+            )
+        ),
+    )
+
+    def reviews():
+        created = 0
+        for title in range(1, sizes["titles"] + 1):
+            count = min(args.reviews_per_title, args.reviews - created)
+            for author in rng.sample(range(1, sizes["users"] + 1), count):
+                created += 1
+                yield Review(
+                    id=created,
+                    title_id=title,
+                    author_id=author,
+                    text=" ".join(rng.choices(words, k=30)),
+                    score=rng.randint(1, 10),
+                )
+
+    save(Review, reviews())
+
+    def comments():
+        whole, fraction = divmod(args.comments_per_review, 1)
+        for review in range(1, args.reviews + 1):
+            for _ in range(int(whole) + (rng.random() < fraction)):
+                yield Comment(
+                    review_id=review,
+                    author_id=rng.randint(1, sizes["users"]),
+                    text=" ".join(rng.choices(words, k=10)),
+                )
+
+    save(Comment, comments())
+    Title.objects.rebuild_ratings()
+    return words
+
+
+class Recorder:
+    """Замеры по маршрутам: время, число SQL-запросов, статус."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.peaks = {}
+        self.requests = {}
+
+    def call(self, route, client, method, path, data=None, record=True):
+        from django.db import connection
+
+        queries = []
+
+        def count(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(count):
+            started = time.perf_counter()
+            if method == "get":
+                response = client.get(path, data)
+            else:
+                response = getattr(client, method)(path, data, format="json")
+            if response.streaming:
+                b"".join(response.streaming_content)
+            elapsed = (time.perf_counter() - started) * 1000
+        if record:
+            self.samples[route].append(
+                (elapsed, len(queries), response.status_code)
+            )
+            self.requests[route] = f"{method.upper()} {path}"
+            self.peaks[route] = peak_rss_kb()
+        return response
+
+    def summary(self):
+        routes = {}
+        for route, samples in self.samples.items():
+            timings = [elapsed for elapsed, _, _ in samples]
+            queries = [count for _, count, _ in samples]
+            routes[route] = {
+                "request": self.requests[route],
+                "count": len(samples),
+                "p50_ms": round(percentile(timings, 0.5), 3),
+                "p95_ms": round(percentile(timings, 0.95), 3),
+                "p99_ms": round(percentile(timings, 0.99), 3),
+                "mean_ms": round(statistics.mean(timings), 3),
+                "queries": round(statistics.mean(queries), 2),
+                "max_queries": max(queries),
+                "statuses": sorted({status for _, _, status in samples}),
+                "peak_rss_kb": self.peaks[route],
+            }
+        return routes
+
+
+def get_client(user):
+    from rest_framework.test import APIClient
+
+    from api.views import CustomTokenObtainView
+
+    client = APIClient()
+    token = CustomTokenObtainView().get_tokens_for_user(user)["token"]
+    client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+    return client
+
+
+def read_routes(words, rng):
+    """GET-маршруты: (имя, клиент, путь, параметры) по образцам из базы."""
+    from django.contrib.auth.tokens import PasswordResetTokenGenerator
+
+    from reviews.models import Comment
+    from titles.models import Genre
+    from users.models import User
+
+    admin, _ = User.objects.get_or_create(
+        username="bench_admin",
+        defaults={"email": "bench_admin@example.com", "role": "admin"},
+    )
+    member, _ = User.objects.get_or_create(
+        username="bench_user",
+        defaults={"email": "bench_user@example.com", "role": "user"},
+    )
+    admin_client, member_client = get_client(admin), get_client(member)
+    comment = Comment.objects.order_by("id").first()
+    review = comment.review
+    title_id = review.title_id
+    reviews = f"/api/v1/titles/{title_id}/reviews/"
+    comments = f"{reviews}{review.id}/comments/"
+    genre = Genre.objects.order_by("id").first()
+    word = rng.choice(words)
+    routes = [
+        ("titles.list", member_client, "/api/v1/titles/", {}),
+        (
+            "titles.list_cursor",
+            member_client,
+            "/api/v1/titles/",
+            {"cursor": "", "ordering": "-rating"},
+        ),
+        (
+            "titles.list_filtered",
+            member_client,
+            "/api/v1/titles/",
+            {"genre": genre.slug, "year": 2000},
+        ),
+        ("titles.search", member_client, "/api/v1/titles/", {"search": word}),
+        ("titles.retrieve", member_client, f"/api/v1/titles/{title_id}/", {}),
+        (
+            "titles.autocomplete",
+            member_client,
+            "/api/v1/titles/autocomplete/",
+            {"q": word[:2]},
+        ),
+        ("categories.list", member_client, "/api/v1/categories/", {}),
+        ("genres.list", member_client, "/api/v1/genres/", {}),
+        (
+            "genres.search",
+            member_client,
+            "/api/v1/genres/",
+            {"search": word[:3]},
+        ),
+        ("reviews.list", member_client, reviews, {}),
+        ("reviews.retrieve", member_client, f"{reviews}{review.id}/", {}),
+        ("comments.list", member_client, comments, {}),
+        ("comments.retrieve", member_client, f"{comments}{comment.id}/", {}),
+        ("users.list", admin_client, "/api/v1/users/", {}),
+        ("users.retrieve", admin_client, "/api/v1/users/bench_user/", {}),
+        ("users.me", member_client, "/api/v1/users/me/", {}),
+        ("export.csv", admin_client, "/api/v1/export/category.csv", {}),
+        ("metrics", admin_client, "/metrics", {}),
+    ]
+    auth = [
+        (
+            "auth.signup",
+            "/api/v1/auth/signup/",
+            {"username": member.username, "email": member.email},
+        ),
+        (
+            "auth.token",
+            "/api/v1/auth/token/",
+            {
+                "username": member.username,
+                "confirmation_code": PasswordResetTokenGenerator().make_token(
+                    member
+                ),
+            },
+        ),
+    ]
+    return routes, auth, admin_client, member_client, reviews, comments
+
+
+def write_cycle(recorder, client, route, path, create, update, record):
+    """Создание, изменение и удаление одного объекта."""
+    response = recorder.call(
+        f"{route}.create", client, "post", path, create, record
+    )
+    key = response.json().get("slug") or response.json().get("username")
+    url = f"{path}{key or response.json()['id']}/"
+    if update is not None:
+        recorder.call(
+            f"{route}.partial_update", client, "patch", url, update, record
+        )
+    recorder.call(f"{route}.destroy", client, "delete", url, None, record)
+
+
+def run(args, words, rng):
+    from django.core import mail
+    from rest_framework.test import APIClient
+
+    recorder = Recorder()
+    routes, auth, admin, member, reviews, comments = read_routes(words, rng)
+    guest = APIClient()
+    mail.outbox = []
+    for iteration in range(args.warmup + args.requests):
+        record = iteration >= args.warmup
+        for route, client, path, params in routes:
+            recorder.call(route, client, "get", path, params, record)
+        for route, path, data in auth:
+            recorder.call(route, guest, "post", path, data, record)
+        suffix = f"bench{iteration}"
+        write_cycle(
+            recorder,
+            admin,
+            "titles",
+            "/api/v1/titles/",
+            {
+                "name": f"Новое {suffix}",
+                "year": 2000,
+                "category": "c1",
+                "genre": ["g1", "g2"],
+            },
+            {"name": f"Другое {suffix}"},
+            record,
+        )
+        for route in ("categories", "genres"):
+            write_cycle(
+                recorder,
+                admin,
+                route,
+                f"/api/v1/{route}/",
+                {"name": f"Новая {suffix}", "slug": suffix},
+                None,
+                record,
+            )
+        write_cycle(
+            recorder,
+            admin,
+            "users",
+            "/api/v1/users/",
+            {"username": suffix, "email": f"{suffix}@example.com"},
+            {"bio": "Био"},
+            record,
+        )
+        write_cycle(
+            recorder,
+            admin,
+            "reviews",
+            reviews,
+            {"text": "Отзыв", "score": 5},
+            {"score": 6},
+            record,
+        )
+        write_cycle(
+            recorder,
+            member,
+            "comments",
+            comments,
+            {"text": "Комментарий"},
+            {"text": "Правка"},
+            record,
+        )
+        mail.outbox = []
+    return recorder.summary()
+
+
+def compare(baseline, current, tolerance, min_delta_ms):
+    """Регрессии против базы: рост p95 сверх допуска или SQL-запросов."""
+    regressions = []
+    for route, result in sorted(current["routes"].items()):
+        base = baseline["routes"].get(route)
+        if base is None:
+            continue
+        delta = result["p95_ms"] - base["p95_ms"]
+        if delta > min_delta_ms and delta > base["p95_ms"] * tolerance:
+            regressions.append(
+                f"{route}: p95 {base['p95_ms']} -> {result['p95_ms']} мс"
+            )
+        if result["max_queries"] > base["max_queries"]:
+            regressions.append(
+                f"{route}: SQL {base['max_queries']} -> "
+                f"{result['max_queries']}"
+            )
+    return regressions
+
+
+def print_table(routes):
+    print(f"{'маршрут':<26}{'p50':>9}{'p95':>9}{'p99':>9}{'SQL':>6}")
+    for route, result in sorted(routes.items()):
+        print(
+            f"{route:<26}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}"
+            f"{result['p99_ms']:>9.2f}{result['max_queries']:>6}"
+        )
+
+
+def benchmark(args, path):
+    setup(path)
+    from reviews.models import Review
+
+    rng = random.Random(args.seed)
+    started = time.perf_counter()
+    if Review.objects.exists():
+        words = make_words(max(args.genres * 4, 2000), rng)
+        generated = None
+    else:
+        words = generate(args, rng)
+        generated = round(time.perf_counter() - started, 1)
+        print(f"{args.reviews} отзывов создано за {generated} с")
+    routes = run(args, words, rng)
+    return {
+        "meta": {
+            "reviews": Review.objects.count(),
+            **get_sizes(args),
+            "seed": args.seed,
+            "requests": args.requests,
+            "generation_seconds": generated,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "peak_rss_kb": peak_rss_kb(),
+        "routes": routes,
+    }
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.database or os.path.join(directory, "bench.sqlite3")
+        results = benchmark(args, path)
+    with open(args.output, "w", encoding="utf-8") as output:
+        json.dump(results, output, ensure_ascii=False, indent=2)
+    print_table(results["routes"])
+    print(f"Пиковый RSS: {results['peak_rss_kb'] / 1024:.0f} МБ")
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as baseline:
+            regressions = compare(
+                json.load(baseline),
+                results,
+                args.tolerance,
+                args.min_delta_ms,
+            )
+        for regression in regressions:
+            print(f"РЕГРЕССИЯ {regression}")
+        if regressions:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""
+Сравнение поиска по FTS5 (Title.objects.search) с name__icontains.
+
+Данные генерируются во временной базе SQLite, рабочая база не трогается.
+Запуск из каталога api_yamdb:
+
+    python -m benchmarks.search_titles --titles 1000000
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from .common import make_words, setup
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--titles", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--words", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=13)
+    return parser.parse_args()
+
+
+def generate(count, words, chunk_size, rng):
+    from titles.models import Title
+
+    started = time.perf_counter()
+    for start in range(0, count, chunk_size):
+        Title.objects.bulk_create(
+            Title(
+                name=" ".join(rng.choices(words, k=3)).capitalize(),
+                year=rng.randint(1900, 2020),
+                description=" ".join(rng.choices(words, k=20)),
+            )
+            for _ in range(min(chunk_size, count - start))
+        )
+    return time.perf_counter() - started
+
+
+def measure(run, words):
+    timings = []
+    for word in words:
+        started = time.perf_counter()
+        run(word)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return (
+        statistics.median(timings),
+        timings[int(len(timings) * 0.95) - 1],
+    )
+
+
+def main():
+    args = parse_args()
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as directory:
+        setup(os.path.join(directory, "bench.sqlite3"))
+        from django.db.models import Q
+
+        from titles.models import Title
+
+        vocabulary = make_words(args.words, rng)
+        elapsed = generate(args.titles, vocabulary, args.chunk_size, rng)
+        print(f"{args.titles} произведений создано за {elapsed:.1f} с")
+        words = rng.choices(vocabulary, k=args.queries)
+
+        def icontains(word):
+            queryset = Title.objects.filter(
+                Q(name__icontains=word) | Q(description__icontains=word)
+            )
+            queryset.count()
+            list(queryset.order_by("id")[:10])
+
+        def search(word):
+            queryset = Title.objects.search(word)
+            queryset.count()
+            list(queryset[:10])
+
+        for label, run in (("icontains", icontains), ("fts5", search)):
+            median, p95 = measure(run, words)
+            print(f"{label:>10}: p50 {median:.1f} мс, p95 {p95:.1f} мс")
+
+
+if __name__ == "__main__":
+    main()
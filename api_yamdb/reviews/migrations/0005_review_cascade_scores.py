@@ -0,0 +1,34 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+import reviews.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("reviews", "0004_review_comment_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="review",
+            name="author",
+            field=models.ForeignKey(
+                on_delete=reviews.models.cascade_review_scores,
+                related_name="reviews",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="review",
+            name="title",
+            field=models.ForeignKey(
+                on_delete=reviews.models.cascade_review_scores,
+                related_name="reviews",
+                to="titles.Title",
+            ),
+        ),
+    ]
@@ -1,19 +1,63 @@
+from collections import defaultdict
+
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import models, transaction
 
 from titles.models import Title
 from users.models import User
 
 
+class ScoreWithdrawal:
+    """
+    Оценки отзывов одного каскада: один UPDATE на произведение.
+
+    Отзывы получают ссылку на пакет до удаления, счетчики сдвигаются
+    в post_delete последнего из них, в транзакции удаления. Если
+    удаляются сами произведения, их счетчики не трогаются.
+    """
+
+    def __init__(self, reviews, titles_deleted):
+        self.pending = set()
+        self.deltas = defaultdict(lambda: [0, 0])
+        self.titles_deleted = titles_deleted
+        for review in reviews:
+            review._score_withdrawal = self
+            self.pending.add(review.pk)
+            delta = self.deltas[review.title_id]
+            delta[0] -= review.score
+            delta[1] -= 1
+
+    def withdraw(self, review):
+        """Произведения, чьи счетчики сдвинуты; пусто, пока пакет не весь."""
+        self.pending.discard(review.pk)
+        if self.pending or self.titles_deleted:
+            return []
+        for title_id, (score_delta, count_delta) in self.deltas.items():
+            Title.objects.filter(pk=title_id).apply_review_score(
+                score_delta, count_delta
+            )
+        return list(self.deltas)
+
+
+def cascade_review_scores(collector, field, sub_objs, using):
+    """CASCADE, после которого оценки снимаются пакетом ScoreWithdrawal.
+
+    Collector удаляет те же экземпляры, что перебраны здесь: sub_objs
+    уже загружен и повторно не читается.
+    """
+    ScoreWithdrawal(sub_objs, titles_deleted=field.name == "title")
+    models.CASCADE(collector, field, sub_objs, using)
+
+
 class Review(models.Model):
     title = models.ForeignKey(
         Title,
-        on_delete=models.CASCADE,
+        on_delete=cascade_review_scores,
         related_name="reviews",
     )
     text = models.TextField()
     author = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="reviews"
+        User, on_delete=cascade_review_scores, related_name="reviews"
     )
     score = models.PositiveSmallIntegerField(
         validators=[
@@ -24,11 +68,22 @@ class Review(models.Model):
     pub_date = models.DateTimeField(
         "Дата публикации", auto_now_add=True, db_index=True
     )
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     class Meta:
         verbose_name = "Rewiew"
         verbose_name_plural = "Rewiews"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["title", "pub_date", "id"],
+                name="review_title_pub_date_idx",
+            ),
+            models.Index(
+                fields=["title", "updated_at"],
+                name="review_title_updated_idx",
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 fields=["title", "author"], name="unique_review"
@@ -38,6 +93,33 @@ class Review(models.Model):
     def __str__(self):
         return self.text[:30]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_score = instance.__dict__.get("score")
+        instance._loaded_title_id = instance.__dict__.get("title_id")
+        return instance
+
+    def save(self, *args, **kwargs):
+        """Сохраняет отзыв и сдвигает счетчики оценок произведения."""
+        created = self._state.adding
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            titles = Title.objects.filter(pk=self.title_id)
+            if created:
+                titles.apply_review_score(self.score, 1)
+            elif getattr(self, "_loaded_score", None) is None:
+                titles.rebuild_ratings()
+            elif self._loaded_title_id != self.title_id:
+                Title.objects.filter(
+                    pk=self._loaded_title_id
+                ).apply_review_score(-self._loaded_score, -1)
+                titles.apply_review_score(self.score, 1)
+            else:
+                titles.apply_review_score(self.score - self._loaded_score, 0)
+        self._loaded_score = self.score
+        self._loaded_title_id = self.title_id
+
 
 class Comment(models.Model):
     review = models.ForeignKey(
@@ -50,11 +132,22 @@ class Comment(models.Model):
     pub_date = models.DateTimeField(
         "Дата добавления", auto_now_add=True, db_index=True
     )
+    updated_at = models.DateTimeField("Дата изменения", auto_now=True)
 
     class Meta:
         verbose_name = "Comment"
         verbose_name_plural = "Comments"
         ordering = ["-pub_date"]
+        indexes = [
+            models.Index(
+                fields=["review", "pub_date", "id"],
+                name="comment_review_pub_date_idx",
+            ),
+            models.Index(
+                fields=["review", "updated_at"],
+                name="comment_review_updated_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.text[:30]
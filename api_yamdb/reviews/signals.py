@@ -0,0 +1,35 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from titles.autocomplete import title_index
+from titles.models import Title
+
+from .models import Review
+
+
+def refresh_autocomplete(title_id):
+    transaction.on_commit(lambda: title_index.refresh(title_id))
+
+
+@receiver(post_delete, sender=Review)
+def withdraw_review_score(sender, instance, **kwargs):
+    """Убирает оценку удаленного отзыва; каскад - пакетом на произведение."""
+    withdrawal = getattr(instance, "_score_withdrawal", None)
+    if withdrawal is not None:
+        for title_id in withdrawal.withdraw(instance):
+            refresh_autocomplete(title_id)
+        return
+    Title.objects.filter(pk=instance.title_id).apply_review_score(
+        -instance.score, -1
+    )
+    refresh_autocomplete(instance.title_id)
+
+
+@receiver(post_save, sender=Review)
+def refresh_title_rating(sender, instance, **kwargs):
+    """Рейтинг меняется и у произведения, с которого отзыв перенесен."""
+    refresh_autocomplete(instance.title_id)
+    loaded_title_id = getattr(instance, "_loaded_title_id", None)
+    if loaded_title_id not in (None, instance.title_id):
+        refresh_autocomplete(loaded_title_id)
@@ -0,0 +1,140 @@
+import heapq
+import threading
+import time
+from bisect import bisect_left, insort
+
+from django.conf import settings
+
+from api.cache import ALL_TABLES, get_versions, local_versions
+
+from .models import MAX_CHAR, Title, normalize_name
+
+
+class TitleNameIndex:
+    """
+    Автодополнение названий произведений из памяти процесса.
+
+    Отсортированный массив (name_normalized, id) строится одним SELECT
+    при первом обращении, префикс ищется бинарным поиском, лучшие по
+    рейтингу выбираются heapq. После коммита сигналы Title и Review
+    обновляют отдельные записи (titles.signals, reviews.signals). Правки
+    из других процессов и команд меняют версии таблиц произведений и
+    отзывов в общем кэше версий (api.cache), и индекс перестраивается
+    при следующем поиске. Версии, выданные сигналами этого процесса,
+    перестройки не требуют. Дополнительно индекс перестраивается раз в
+    refresh_interval секунд; None отключает такую перестройку.
+    """
+
+    fields = ("id", "name", "name_normalized", "year", "rating")
+
+    def __init__(self, refresh_interval=None):
+        self.refresh_interval = refresh_interval
+        self.lock = threading.Lock()
+        self.keys = None
+        self.titles = {}
+        self.built_at = None
+        self.versions = None
+
+    @staticmethod
+    def get_tables():
+        reviews = Title._meta.get_field("reviews").related_model
+        return (Title._meta.db_table, reviews._meta.db_table)
+
+    def is_fresh(self):
+        if self.keys is None or (
+            self.refresh_interval is not None
+            and time.monotonic() - self.built_at >= self.refresh_interval
+        ):
+            return False
+        tables = (ALL_TABLES, *self.get_tables())
+        versions = get_versions(tables[1:])
+        for table, seen, version in zip(tables, self.versions, versions):
+            if version != seen and (
+                table == ALL_TABLES or local_versions.get(table) != version
+            ):
+                return False
+        self.versions = versions
+        return True
+
+    def build(self):
+        with self.lock:
+            if self.is_fresh():
+                return
+            # Версии до SELECT: запись во время чтения вызовет еще одну
+            # перестройку, а не потеряется.
+            versions = get_versions(self.get_tables())
+            titles = {
+                row[0]: row
+                for row in Title.objects.order_by().values_list(*self.fields)
+            }
+            self.keys = sorted((row[2], pk) for pk, row in titles.items())
+            self.titles = titles
+            self.built_at = time.monotonic()
+            self.versions = versions
+
+    def reset(self):
+        with self.lock:
+            self.keys = None
+            self.titles = {}
+
+    def refresh(self, pk):
+        """Перечитывает одно произведение, если индекс уже построен."""
+        if self.keys is None:
+            return
+        row = (
+            Title.objects.filter(pk=pk)
+            .order_by()
+            .values_list(*self.fields)
+            .first()
+        )
+        with self.lock:
+            if self.keys is None:
+                return
+            self.discard_locked(pk)
+            if row is not None:
+                self.titles[pk] = row
+                insort(self.keys, (row[2], pk))
+
+    def discard(self, pk):
+        with self.lock:
+            if self.keys is not None:
+                self.discard_locked(pk)
+
+    def discard_locked(self, pk):
+        row = self.titles.pop(pk, None)
+        if row is None:
+            return
+        key = (row[2], pk)
+        index = bisect_left(self.keys, key)
+        if index < len(self.keys) and self.keys[index] == key:
+            del self.keys[index]
+
+    @staticmethod
+    def rank(row):
+        rating = row[4]
+        return (rating is None, -(rating or 0), row[2], row[0])
+
+    def search(self, text, limit):
+        """До limit произведений с названием на text, лучшие первыми."""
+        prefix = normalize_name(text)
+        if not prefix or limit < 1:
+            return []
+        if not self.is_fresh():
+            self.build()
+        keys, titles = self.keys, self.titles
+        start = bisect_left(keys, (prefix,))
+        end = bisect_left(keys, (prefix + MAX_CHAR,), start)
+        # Записи могут сдвинуться параллельным обновлением: префикс и
+        # наличие строки проверяются еще раз.
+        rows = (
+            row
+            for row in map(titles.get, (pk for _, pk in keys[start:end]))
+            if row is not None and row[2].startswith(prefix)
+        )
+        return [
+            {"id": row[0], "name": row[1], "year": row[3], "rating": row[4]}
+            for row in heapq.nsmallest(limit, rows, key=self.rank)
+        ]
+
+
+title_index = TitleNameIndex(settings.AUTOCOMPLETE_REFRESH_INTERVAL)
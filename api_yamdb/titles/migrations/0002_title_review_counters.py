@@ -0,0 +1,54 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:14
+
+from django.db import migrations, models
+from django.db.models import Case, Count, F, OuterRef, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+
+
+def fill_review_counters(apps, schema_editor):
+    Title = apps.get_model("titles", "Title")
+    Review = apps.get_model("reviews", "Review")
+    reviews = (
+        Review.objects.filter(title=OuterRef("pk"))
+        .order_by()
+        .values("title")
+    )
+    Title.objects.update(
+        score_sum=Coalesce(
+            Subquery(reviews.annotate(total=Sum("score")).values("total")),
+            0,
+        ),
+        review_count=Coalesce(
+            Subquery(reviews.annotate(total=Count("pk")).values("total")),
+            0,
+        ),
+    )
+    Title.objects.update(
+        rating=Case(
+            When(review_count=0, then=None),
+            default=F("score_sum") / F("review_count"),
+            output_field=models.IntegerField(),
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("titles", "0001_initial"),
+        ("reviews", "0002_auto_20220421_2344"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="review_count",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="score_sum",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_review_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("titles", "0002_title_review_counters"),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="title",
+            options={"ordering": ["id"]},
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["year", "id"], name="title_year_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["name", "id"], name="title_name_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="title",
+            index=models.Index(
+                fields=["rating", "id"], name="title_rating_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 2.2.16 on 2026-10-18 19:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("titles", "0003_title_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="title",
+            name="updated_at",
+            field=models.DateTimeField(
+                auto_now=True, db_index=True, verbose_name="Дата изменения"
+            ),
+        ),
+    ]
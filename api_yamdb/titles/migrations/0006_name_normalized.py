@@ -0,0 +1,97 @@
+from django.db import migrations, models
+
+import titles.models
+from titles.models import name_trigrams, normalize_name
+
+BATCH_SIZE = 1000
+
+
+def fill_name_normalized(apps, schema_editor):
+    NameTrigram = apps.get_model("titles", "NameTrigram")
+    for model_name in ("category", "genre", "title"):
+        model = apps.get_model("titles", model_name)
+        objects = list(model.objects.only("id", "name"))
+        for instance in objects:
+            instance.name_normalized = normalize_name(instance.name)
+        model.objects.bulk_update(
+            objects, ["name_normalized"], batch_size=BATCH_SIZE
+        )
+        NameTrigram.objects.bulk_create(
+            (
+                NameTrigram(
+                    model_name=model_name,
+                    object_id=instance.pk,
+                    trigram=trigram,
+                )
+                for instance in objects
+                for trigram in name_trigrams(instance.name_normalized)
+            ),
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("titles", "0005_title_search"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="NameTrigram",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("model_name", models.CharField(max_length=32)),
+                ("object_id", models.PositiveIntegerField()),
+                ("trigram", models.CharField(max_length=3)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="nametrigram",
+            index=models.Index(
+                fields=["model_name", "object_id"],
+                name="name_trigram_object_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="nametrigram",
+            constraint=models.UniqueConstraint(
+                fields=("model_name", "trigram", "object_id"),
+                name="unique_name_trigram",
+            ),
+        ),
+        migrations.AddField(
+            model_name="category",
+            name="name_normalized",
+            field=titles.models.NormalizedNameField(
+                db_index=True, default="", editable=False, max_length=256
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="genre",
+            name="name_normalized",
+            field=titles.models.NormalizedNameField(
+                db_index=True, default="", editable=False, max_length=256
+            ),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name="title",
+            name="name_normalized",
+            field=titles.models.NormalizedNameField(
+                db_index=True, default="", editable=False, max_length=256
+            ),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_name_normalized, migrations.RunPython.noop),
+    ]
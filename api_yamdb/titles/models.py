@@ -1,37 +1,280 @@
+import re
+import unicodedata
 from datetime import date as dt
 
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import connections, models
+from django.db.models import Case, Count, F, OuterRef, Q, Subquery, Sum, When
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .search import SEARCH_TABLE
+
+RATING = Case(
+    When(review_count=0, then=None),
+    default=F("score_sum") / F("review_count"),
+    output_field=models.IntegerField(),
+)
+
+SEARCH_WORD = re.compile(r"\w+")
+
+# Больше любого символа: верхняя граница диапазона для поиска по префиксу.
+MAX_CHAR = chr(0x10FFFF)
+
+
+def normalize_name(value):
+    """Форма имени для поиска без учета регистра: NFKC + casefold."""
+    return unicodedata.normalize("NFKC", value or "").casefold()
+
+
+def name_trigrams(value):
+    return {"".join(chars) for chars in zip(value, value[1:], value[2:])}
+
+
+class NormalizedNameField(models.CharField):
+    """Индексированная тень name: normalize_name(name).
+
+    Заполняется в pre_save, то есть и при save(), и при bulk_create().
+    LIKE в SQLite складывает регистр только для ASCII, поэтому поиск
+    идет по этому полю, а не по name.
+    """
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault("max_length", 256)
+        kwargs["editable"] = False
+        kwargs["db_index"] = True
+        super().__init__(*args, **kwargs)
+
+    def pre_save(self, model_instance, add):
+        value = normalize_name(model_instance.name)
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class NameQuerySet(models.QuerySet):
+    """Поиск по name_normalized: регистр не важен и для кириллицы."""
+
+    def name_startswith(self, text):
+        """Префикс как диапазон по индексу name_normalized."""
+        value = normalize_name(text)
+        if not value:
+            return self
+        return self.filter(
+            name_normalized__gte=value, name_normalized__lt=value + MAX_CHAR
+        )
+
+    def name_contains(self, text):
+        """Подстрока: кандидаты по триграммам, затем точная проверка.
+
+        Строки короче трех символов проверяются только по name_normalized.
+        """
+        value = normalize_name(text)
+        if not value:
+            return self
+        queryset = self.filter(name_normalized__contains=value)
+        trigrams = name_trigrams(value)
+        if not trigrams:
+            return queryset
+        candidates = (
+            NameTrigram.objects.filter(
+                model_name=self.model._meta.model_name, trigram__in=trigrams
+            )
+            .values("object_id")
+            .annotate(matched=Count("trigram"))
+            .filter(matched=len(trigrams))
+            .values("object_id")
+        )
+        return queryset.filter(pk__in=candidates)
+
+
+class NameTrigramQuerySet(models.QuerySet):
+    def index(self, instances):
+        """Добавляет триграммы имен; повтор для тех же строк безопасен."""
+        return self.bulk_create(
+            [
+                self.model(
+                    model_name=instance._meta.model_name,
+                    object_id=instance.pk,
+                    trigram=trigram,
+                )
+                for instance in instances
+                for trigram in name_trigrams(instance.name_normalized)
+            ],
+            ignore_conflicts=True,
+        )
+
+    def for_instance(self, instance):
+        return self.filter(
+            model_name=instance._meta.model_name, object_id=instance.pk
+        )
+
+
+class NameTrigram(models.Model):
+    """Триграммы name_normalized для поиска подстроки по индексу."""
+
+    model_name = models.CharField(max_length=32)
+    object_id = models.PositiveIntegerField()
+    trigram = models.CharField(max_length=3)
+
+    objects = NameTrigramQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["model_name", "trigram", "object_id"],
+                name="unique_name_trigram",
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["model_name", "object_id"],
+                name="name_trigram_object_idx",
+            )
+        ]
 
 
 class Category(models.Model):
     name = models.CharField(max_length=256)
+    name_normalized = NormalizedNameField()
     slug = models.SlugField(unique=True)
 
+    objects = NameQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.name
 
 
 class Genre(models.Model):
     name = models.CharField(max_length=256)
+    name_normalized = NormalizedNameField()
     slug = models.SlugField(unique=True)
 
+    objects = NameQuerySet.as_manager()
+
     def __str__(self) -> str:
         return self.name
 
 
+class TitleQuerySet(NameQuerySet):
+    def for_read(self):
+        """Выборка для list/retrieve без N+1 по category и genre."""
+        return (
+            self.select_related("category")
+            .prefetch_related(
+                models.Prefetch(
+                    "genre", queryset=Genre.objects.only("id", "name", "slug")
+                )
+            )
+            .only(
+                "id",
+                "name",
+                "year",
+                "rating",
+                "description",
+                "category",
+                "category__name",
+                "category__slug",
+            )
+        )
+
+    def search(self, text):
+        """Полнотекстовый поиск по name и description, лучшие первыми.
+
+        На SQLite запрос идет в FTS5-индекс SEARCH_TABLE (titles.search)
+        и сортируется по bm25, каждое слово ищется как префикс.
+        На других СУБД - icontains по всем словам.
+        """
+        words = SEARCH_WORD.findall(text)
+        if not words:
+            return self.none()
+        if connections[self.db].vendor != "sqlite":
+            condition = Q()
+            for word in words:
+                condition &= Q(name__icontains=word) | Q(
+                    description__icontains=word
+                )
+            return self.filter(condition)
+        table = self.model._meta.db_table
+        return self.extra(
+            select={"search_rank": f"bm25({SEARCH_TABLE})"},
+            tables=[SEARCH_TABLE],
+            where=[
+                f"{SEARCH_TABLE}.rowid = {table}.id",
+                f"{SEARCH_TABLE} MATCH %s",
+            ],
+            params=[" ".join(f'"{word}"*' for word in words)],
+        ).order_by("search_rank", "id")
+
+    def apply_review_score(self, score_delta, count_delta):
+        """Сдвигает счетчики оценок и пересчитывает rating одним UPDATE.
+
+        Выражения в SET видят значения строки до обновления, поэтому
+        rating считается по уже сдвинутым счетчикам явно.
+        """
+        if not score_delta and not count_delta:
+            return 0
+        score_sum = F("score_sum") + score_delta
+        review_count = F("review_count") + count_delta
+        return self.update(
+            score_sum=score_sum,
+            review_count=review_count,
+            updated_at=timezone.now(),
+            rating=Case(
+                When(review_count=-count_delta, then=None),
+                default=score_sum / review_count,
+                output_field=models.IntegerField(),
+            ),
+        )
+
+    def rebuild_ratings(self):
+        """Пересчитывает счетчики оценок по таблице отзывов."""
+        review_model = self.model._meta.get_field("reviews").related_model
+        reviews = (
+            review_model.objects.filter(title=OuterRef("pk"))
+            .order_by()
+            .values("title")
+        )
+        self.update(
+            score_sum=Coalesce(
+                Subquery(reviews.annotate(total=Sum("score")).values("total")),
+                0,
+            ),
+            review_count=Coalesce(
+                Subquery(reviews.annotate(total=Count("pk")).values("total")),
+                0,
+            ),
+        )
+        return self.update(rating=RATING, updated_at=timezone.now())
+
+
 class Title(models.Model):
     name = models.CharField(max_length=256)
+    name_normalized = NormalizedNameField()
     year = models.PositiveIntegerField(
         db_index=True,
         validators=[MinValueValidator(1), MaxValueValidator(dt.today().year)],
     )
     rating = models.IntegerField(default=None, null=True, blank=True)
+    score_sum = models.PositiveIntegerField(default=0, editable=False)
+    review_count = models.PositiveIntegerField(default=0, editable=False)
+    updated_at = models.DateTimeField(
+        "Дата изменения", auto_now=True, db_index=True
+    )
     description = models.TextField(blank=True)
     genre = models.ManyToManyField(Genre)
     category = models.ForeignKey(
         Category, on_delete=models.SET_NULL, related_name="titles", null=True
     )
 
+    objects = TitleQuerySet.as_manager()
+
+    class Meta:
+        ordering = ["id"]
+        indexes = [
+            models.Index(fields=["year", "id"], name="title_year_id_idx"),
+            models.Index(fields=["name", "id"], name="title_name_id_idx"),
+            models.Index(fields=["rating", "id"], name="title_rating_id_idx"),
+        ]
+
     def __str__(self) -> str:
         return self.name
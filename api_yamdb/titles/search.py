@@ -0,0 +1,75 @@
+"""FTS5-индекс по Title.name и description (только SQLite)."""
+
+SEARCH_TABLE = "titles_title_fts"
+DELETE_SQL = (
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, description) "
+    "VALUES ('delete', old.id, old.name, old.description); "
+)
+INSERT_SQL = (
+    f"INSERT INTO {SEARCH_TABLE}(rowid, name, description) "
+    "VALUES (new.id, new.name, new.description); "
+)
+
+SEARCH_OBJECTS = (
+    (
+        SEARCH_TABLE,
+        f"CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5("
+        "name, description, content='titles_title', content_rowid='id')",
+    ),
+    (
+        f"{SEARCH_TABLE}_insert",
+        f"CREATE TRIGGER {SEARCH_TABLE}_insert AFTER INSERT ON titles_title "
+        f"BEGIN {INSERT_SQL} END",
+    ),
+    (
+        f"{SEARCH_TABLE}_delete",
+        f"CREATE TRIGGER {SEARCH_TABLE}_delete AFTER DELETE ON titles_title "
+        f"BEGIN {DELETE_SQL} END",
+    ),
+    (
+        f"{SEARCH_TABLE}_update",
+        f"CREATE TRIGGER {SEARCH_TABLE}_update "
+        "AFTER UPDATE OF name, description ON titles_title "
+        f"BEGIN {DELETE_SQL}{INSERT_SQL} END",
+    ),
+)
+
+
+def get_existing(cursor):
+    cursor.execute(
+        "SELECT name FROM sqlite_master "
+        "WHERE type IN ('table', 'trigger') AND name LIKE 'titles_title%'"
+    )
+    return {row[0] for row in cursor.fetchall()}
+
+
+def install_search_index(connection):
+    """Создает недостающие таблицу и триггеры и переиндексирует.
+
+    SQLite-миграции пересоздают titles_title при изменении схемы, и
+    триггеры при этом пропадают, поэтому вызывается и после migrate.
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        existing = get_existing(cursor)
+        if "titles_title" not in existing:
+            return False
+        missing = [sql for name, sql in SEARCH_OBJECTS if name not in existing]
+        if not missing:
+            return False
+        for sql in missing:
+            cursor.execute(sql)
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+    return True
+
+
+def drop_search_index(connection):
+    if connection.vendor != "sqlite":
+        return
+    with connection.cursor() as cursor:
+        for name, sql in reversed(SEARCH_OBJECTS):
+            kind = "TABLE" if name == SEARCH_TABLE else "TRIGGER"
+            cursor.execute(f"DROP {kind} IF EXISTS {name}")
@@ -0,0 +1,41 @@
+from django.db import connections, transaction
+from django.db.models.signals import post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from .autocomplete import title_index
+from .models import Category, Genre, NameTrigram, Title
+from .search import install_search_index
+
+
+def index_name(sender, instance, update_fields=None, **kwargs):
+    """Пересобирает триграммы имени после сохранения."""
+    if update_fields is not None and "name" not in update_fields:
+        return
+    NameTrigram.objects.for_instance(instance).delete()
+    NameTrigram.objects.index([instance])
+
+
+def drop_name_index(sender, instance, **kwargs):
+    NameTrigram.objects.for_instance(instance).delete()
+
+
+for model in (Category, Genre, Title):
+    post_save.connect(index_name, sender=model)
+    post_delete.connect(drop_name_index, sender=model)
+
+
+@receiver(post_migrate)
+def restore_search_index(sender, using, **kwargs):
+    if sender.name == "titles":
+        install_search_index(connections[using])
+
+
+@receiver(post_save, sender=Title)
+def refresh_autocomplete(sender, instance, **kwargs):
+    transaction.on_commit(lambda: title_index.refresh(instance.pk))
+
+
+@receiver(post_delete, sender=Title)
+def discard_autocomplete(sender, instance, **kwargs):
+    pk = instance.pk
+    transaction.on_commit(lambda: title_index.discard(pk))
@@ -0,0 +1,69 @@
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from .models import OutgoingEmail
+
+
+def enqueue_mail(subject, body, from_email, recipients):
+    """Ставит письмо в очередь OutgoingEmail.
+
+    При EMAIL_OUTBOX_EAGER письмо еще и отправляется сразу через
+    EMAIL_BACKEND и записывается отправленным; если отправка упала,
+    оно остается в очереди для воркера.
+    """
+    email = OutgoingEmail(
+        subject=subject,
+        body=body,
+        from_email=from_email,
+        recipients="\n".join(recipients),
+    )
+    try:
+        if settings.EMAIL_OUTBOX_EAGER:
+            email.as_message().send()
+            email.sent_at = timezone.now()
+    finally:
+        email.save()
+    return email
+
+
+def get_backoff(attempts, base, limit):
+    """Экспоненциальная пауза с разбросом, чтобы повторы не шли пачкой."""
+    delay = min(limit, base * 2 ** (attempts - 1))
+    return timedelta(seconds=delay * random.uniform(0.5, 1))
+
+
+def deliver(emails, connection, backoff_base, backoff_limit):
+    """Отправляет письма через одно открытое соединение.
+
+    Успешные помечаются одним UPDATE, неудачные переносятся на
+    следующую попытку. Возвращает (отправлено, ошибок).
+    """
+    sent = []
+    failed = 0
+    try:
+        for email in emails:
+            try:
+                connection.send_messages([email.as_message(connection)])
+            except Exception as error:
+                failed += 1
+                email.attempts += 1
+                email.last_error = repr(error)
+                email.next_attempt_at = timezone.now() + get_backoff(
+                    email.attempts, backoff_base, backoff_limit
+                )
+                email.save(
+                    update_fields=["attempts", "last_error", "next_attempt_at"]
+                )
+                # После ошибки SMTP-сессия может быть сломана.
+                connection.close()
+                connection.open()
+            else:
+                sent.append(email.pk)
+    finally:
+        OutgoingEmail.objects.filter(pk__in=sent).update(
+            sent_at=timezone.now()
+        )
+    return len(sent), failed
@@ -0,0 +1,217 @@
+"""
+Почтовый бэкенд, дописывающий письма в NDJSON-журнал с ротацией.
+
+Вместо файла на каждое письмо (filebased) все письма идут строками
+в EMAIL_FILE_PATH/mail.ndjson. При превышении EMAIL_LOG_MAX_BYTES файл
+сдвигается в mail.ndjson.1 и далее, хранится EMAIL_LOG_BACKUPS старых
+файлов. Запись в ОС идет на каждый send_messages одним write, fsync -
+не чаще раза в EMAIL_LOG_FSYNC_INTERVAL секунд и при выходе процесса.
+Процессы WSGI пишут и ротируют журнал под flock и после чужой ротации
+открывают файл заново.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows: без межпроцессной блокировки.
+    fcntl = None
+
+from django.conf import settings
+from django.core.mail.backends.base import BaseEmailBackend
+from django.utils import timezone
+
+LOG_NAME = "mail.ndjson"
+READ_BLOCK_SIZE = 64 * 1024
+
+
+class MailLog:
+    """Журнал писем процесса: общий для всех экземпляров бэкенда."""
+
+    def __init__(self, directory, max_bytes, backups, fsync_interval):
+        self.directory = directory
+        self.path = os.path.join(directory, LOG_NAME)
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.fsync_interval = fsync_interval
+        self.lock = threading.Lock()
+        self.file = None
+        self.synced_at = 0.0
+        self.dirty = False
+
+    def open(self):
+        """Открывает mail.ndjson и берет flock.
+
+        Если файл успели сдвинуть или удалить в другом процессе,
+        дескриптор указывает на старый inode: файл открывается заново,
+        как в logging.handlers.WatchedFileHandler.
+        """
+        while True:
+            if self.file is None:
+                os.makedirs(self.directory, exist_ok=True)
+                self.file = open(self.path, "ab")
+            if fcntl is not None:
+                fcntl.flock(self.file, fcntl.LOCK_EX)
+            if self.is_current():
+                return
+            self.unlock()
+            self.file.close()
+            self.file = None
+
+    def is_current(self):
+        try:
+            path_stat = os.stat(self.path)
+        except FileNotFoundError:
+            return False
+        file_stat = os.fstat(self.file.fileno())
+        return (path_stat.st_dev, path_stat.st_ino) == (
+            file_stat.st_dev,
+            file_stat.st_ino,
+        )
+
+    def unlock(self):
+        if fcntl is not None:
+            fcntl.flock(self.file, fcntl.LOCK_UN)
+
+    def append(self, records):
+        data = b"".join(
+            json.dumps(record, ensure_ascii=False).encode() + b"\n"
+            for record in records
+        )
+        with self.lock:
+            self.open()
+            try:
+                # Размер по fstat: другие процессы тоже дописывают файл.
+                size = os.fstat(self.file.fileno()).st_size
+                if size and size + len(data) > self.max_bytes:
+                    self.rotate()
+                self.file.write(data)
+                self.file.flush()
+                self.dirty = True
+                if time.monotonic() - self.synced_at >= self.fsync_interval:
+                    self.sync()
+            finally:
+                self.unlock()
+
+    def sync(self):
+        if self.file is not None and self.dirty:
+            os.fsync(self.file.fileno())
+            self.dirty = False
+        self.synced_at = time.monotonic()
+
+    def rotate(self):
+        """Под flock старого файла: новый файл блокируется до снятия."""
+        self.sync()
+        for number in range(self.backups - 1, 0, -1):
+            source = f"{self.path}.{number}"
+            if os.path.exists(source):
+                os.replace(source, f"{self.path}.{number + 1}")
+        if self.backups:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        previous = self.file
+        self.file = None
+        self.open()
+        if fcntl is not None:
+            fcntl.flock(previous, fcntl.LOCK_UN)
+        previous.close()
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.sync()
+                self.file.close()
+                self.file = None
+
+
+_logs = {}
+_logs_lock = threading.Lock()
+
+
+def get_mail_log(directory):
+    with _logs_lock:
+        if directory not in _logs:
+            _logs[directory] = MailLog(
+                directory,
+                settings.EMAIL_LOG_MAX_BYTES,
+                settings.EMAIL_LOG_BACKUPS,
+                settings.EMAIL_LOG_FSYNC_INTERVAL,
+            )
+        return _logs[directory]
+
+
+@atexit.register
+def close_mail_logs():
+    for log in list(_logs.values()):
+        log.close()
+
+
+class MailLogBackend(BaseEmailBackend):
+    def __init__(self, file_path=None, **kwargs):
+        super().__init__(**kwargs)
+        self.log = get_mail_log(file_path or settings.EMAIL_FILE_PATH)
+
+    def send_messages(self, email_messages):
+        if not email_messages:
+            return 0
+        sent_at = timezone.now().isoformat()
+        records = [
+            {
+                "date": sent_at,
+                "from": message.from_email,
+                "to": message.recipients(),
+                "subject": message.subject,
+                "body": message.body,
+            }
+            for message in email_messages
+        ]
+        try:
+            self.log.append(records)
+        except OSError:
+            if not self.fail_silently:
+                raise
+            return 0
+        return len(records)
+
+
+def iter_lines_reversed(path, block_size=READ_BLOCK_SIZE):
+    """Строки файла с конца, блоками: последние письма без чтения всего."""
+    with open(path, "rb") as source:
+        position = source.seek(0, os.SEEK_END)
+        tail = b""
+        while position > 0:
+            size = min(block_size, position)
+            position -= size
+            source.seek(position)
+            lines = (source.read(size) + tail).split(b"\n")
+            tail = lines.pop(0)
+            for line in reversed(lines):
+                if line:
+                    yield line
+        if tail:
+            yield tail
+
+
+def find_latest(address, directory=None):
+    """Последнее письмо на address: от нового файла журнала к старым."""
+    path = os.path.join(directory or settings.EMAIL_FILE_PATH, LOG_NAME)
+    address = address.lower()
+    paths = [path] + [
+        f"{path}.{number}"
+        for number in range(1, settings.EMAIL_LOG_BACKUPS + 1)
+    ]
+    for log_path in paths:
+        if not os.path.exists(log_path):
+            continue
+        for line in iter_lines_reversed(log_path):
+            # Дешевая проверка до разбора JSON.
+            if address.encode() not in line.lower():
+                continue
+            record = json.loads(line)
+            if address in (to.lower() for to in record["to"]):
+                return record
+    return None
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.maillog import find_latest
+
+
+class Command(BaseCommand):
+    help = (
+        "Печатает последнее письмо на адрес из журнала MailLogBackend, "
+        "читая файлы с конца."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("email")
+        parser.add_argument(
+            "--body-only",
+            action="store_true",
+            help="Только текст письма, например код подтверждения.",
+        )
+        parser.add_argument("--path", help="Каталог журнала писем.")
+
+    def handle(self, *args, **options):
+        record = find_latest(options["email"], options["path"])
+        if record is None:
+            raise CommandError(f"Писем на {options['email']} нет")
+        if options["body_only"]:
+            self.stdout.write(record["body"])
+            return
+        self.stdout.write(
+            f"Date: {record['date']}\n"
+            f"From: {record['from']}\n"
+            f"To: {', '.join(record['to'])}\n"
+            f"Subject: {record['subject']}\n\n"
+            f"{record['body']}"
+        )
@@ -0,0 +1,75 @@
+import time
+
+from django.core.mail import get_connection
+from django.core.management.base import BaseCommand, CommandError
+
+from users.mail import deliver
+from users.models import OutgoingEmail
+
+
+class Command(BaseCommand):
+    help = (
+        "Отправляет письма из очереди OutgoingEmail порциями через одно "
+        "соединение EMAIL_BACKEND, неудачные повторяет с экспоненциальной "
+        "паузой. Рассчитан на один процесс-воркер."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=5.0,
+            help="Пауза при пустой очереди, секунды.",
+        )
+        parser.add_argument("--max-attempts", type=int, default=8)
+        parser.add_argument(
+            "--backoff",
+            type=float,
+            default=30.0,
+            help="Пауза после первой ошибки, дальше удваивается.",
+        )
+        parser.add_argument("--backoff-limit", type=float, default=3600.0)
+        parser.add_argument(
+            "--once",
+            action="store_true",
+            help="Разобрать готовые к отправке письма и завершиться.",
+        )
+
+    def handle(self, *args, **options):
+        connection = get_connection(fail_silently=False)
+        try:
+            while True:
+                emails = list(
+                    OutgoingEmail.objects.pending(options["max_attempts"])[
+                        : options["batch_size"]
+                    ]
+                )
+                if not emails:
+                    if options["once"]:
+                        break
+                    # Не держим SMTP-сессию открытой, пока очередь пуста.
+                    connection.close()
+                    time.sleep(options["interval"])
+                    continue
+                try:
+                    connection.open()
+                    sent, failed = deliver(
+                        emails,
+                        connection,
+                        options["backoff"],
+                        options["backoff_limit"],
+                    )
+                except Exception as error:
+                    # Упало само соединение: письма остались в очереди.
+                    if options["once"]:
+                        raise CommandError(f"Нет соединения: {error!r}")
+                    self.stderr.write(f"Нет соединения: {error!r}")
+                    connection.close()
+                    time.sleep(options["interval"])
+                    continue
+                self.stdout.write(f"Отправлено: {sent}, ошибок: {failed}")
+        except KeyboardInterrupt:
+            pass
+        finally:
+            connection.close()
@@ -0,0 +1,80 @@
+from collections import Counter
+
+from django.db import migrations
+
+import users.models
+
+
+def find_duplicates(values):
+    counts = Counter(value for value in values if value)
+    return sorted(value for value, count in counts.items() if count > 1)
+
+
+def fill_normalized(apps, schema_editor):
+    """Заполняет тени email/username до включения уникальности.
+
+    Пустой email хранится как NULL. Email и username, совпадающие после
+    нормализации, автоматически не разрешаются: тень пересчитывается
+    при каждом save(), и пользователь без нее упал бы на уникальности.
+    Миграция останавливается со списком таких значений, их нужно
+    исправить вручную.
+    """
+    User = apps.get_model("users", "User")
+    normalize = users.models.normalize_identifier
+    users_list = list(User.objects.order_by("id"))
+    errors = []
+    for field, label in (("username", "Username"), ("email", "Email")):
+        duplicates = find_duplicates(
+            normalize(getattr(user, field)) for user in users_list
+        )
+        if duplicates:
+            errors.append(
+                f"{label} совпадают без учета регистра: "
+                + ", ".join(duplicates)
+            )
+    if errors:
+        raise RuntimeError("; ".join(errors))
+    for user in users_list:
+        user.username_normalized = normalize(user.username)
+        user.email_normalized = normalize(user.email) or None
+    User.objects.bulk_update(
+        users_list, ["username_normalized", "email_normalized"], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_outgoing_email"),
+    ]
+
+    operations = [
+        migrations.AlterModelManagers(
+            name="user",
+            managers=[
+                ("objects", users.models.UserManager()),
+            ],
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="email_normalized",
+            field=users.models.NormalizedField(
+                max_length=254, null=True, source="email"
+            ),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="username_normalized",
+            field=users.models.NormalizedField(
+                max_length=150, null=True, source="username"
+            ),
+        ),
+        migrations.RunPython(fill_normalized, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="user",
+            name="username_normalized",
+            field=users.models.NormalizedField(
+                max_length=150, source="username"
+            ),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 2.2.16 on 2026-10-18 20:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0004_normalized_identifiers"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClaimsRevocation",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("user_id", models.PositiveIntegerField(db_index=True)),
+                ("revoked_at", models.PositiveIntegerField(db_index=True)),
+            ],
+        ),
+    ]
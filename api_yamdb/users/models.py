@@ -1,5 +1,10 @@
+import unicodedata
+
 from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import UserManager as BaseUserManager
+from django.core.mail import EmailMessage
 from django.db import models
+from django.utils import timezone
 
 ROLE_CHOICES = (
     ("user", "user"),
@@ -8,9 +13,118 @@ ROLE_CHOICES = (
 )
 
 
+def normalize_identifier(value):
+    """Форма email/username для сравнения без учета регистра."""
+    return unicodedata.normalize("NFKC", value or "").strip().casefold()
+
+
+class NormalizedField(models.CharField):
+    """Уникальная индексированная тень поля source: normalize_identifier.
+
+    Заполняется в pre_save, то есть и при save(), и при bulk_create().
+    При null=True пустое значение хранится как NULL: пустые email
+    не конфликтуют между собой.
+    """
+
+    def __init__(self, source, *args, **kwargs):
+        self.source = source
+        kwargs["editable"] = False
+        kwargs["unique"] = True
+        super().__init__(*args, **kwargs)
+
+    def deconstruct(self):
+        name, path, args, kwargs = super().deconstruct()
+        kwargs["source"] = self.source
+        del kwargs["editable"], kwargs["unique"]
+        return name, path, args, kwargs
+
+    def pre_save(self, model_instance, add):
+        value = normalize_identifier(getattr(model_instance, self.source))
+        if not value and self.null:
+            value = None
+        setattr(model_instance, self.attname, value)
+        return value
+
+
+class UserQuerySet(models.QuerySet):
+    def by_email(self, email):
+        return self.filter(email_normalized=normalize_identifier(email))
+
+    def by_username(self, username):
+        return self.filter(username_normalized=normalize_identifier(username))
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
+
 class User(AbstractUser):
     bio = models.TextField(
         "Биография",
         blank=True,
     )
     role = models.CharField(max_length=100, choices=ROLE_CHOICES)
+    email_normalized = NormalizedField("email", max_length=254, null=True)
+    username_normalized = NormalizedField("username", max_length=150)
+
+    objects = UserManager()
+
+
+class ClaimsRevocation(models.Model):
+    """Момент, после которого claims в токенах пользователя не действуют.
+
+    Без внешнего ключа: отметка удаленного пользователя тоже нужна.
+    Строк у пользователя может оказаться несколько, действует последняя.
+    """
+
+    user_id = models.PositiveIntegerField(db_index=True)
+    revoked_at = models.PositiveIntegerField(db_index=True)
+
+    def __str__(self) -> str:
+        return f"{self.user_id}: {self.revoked_at}"
+
+
+class OutgoingEmailQuerySet(models.QuerySet):
+    def pending(self, max_attempts):
+        """Неотправленные письма, у которых подошло время попытки."""
+        return self.filter(
+            sent_at__isnull=True,
+            next_attempt_at__lte=timezone.now(),
+            attempts__lt=max_attempts,
+        ).order_by("next_attempt_at", "id")
+
+
+class OutgoingEmail(models.Model):
+    """Письмо в очереди на отправку (manage.py run_mail_worker)."""
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254)
+    recipients = models.TextField(help_text="Адреса, по одному на строку")
+    created_at = models.DateTimeField(auto_now_add=True)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = OutgoingEmailQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["sent_at", "next_attempt_at"],
+                name="outgoing_email_pending_idx",
+            )
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.subject} -> {self.recipients}"
+
+    def as_message(self, connection=None):
+        return EmailMessage(
+            self.subject,
+            self.body,
+            self.from_email,
+            self.recipients.splitlines(),
+            connection=connection,
+        )